@@ -0,0 +1,157 @@
+"""
+fixtures/ altındaki kayıtlı sayfalar üzerinde parser benchmark'ı.
+
+    python benchmark_parsers.py                  # ölç ve baseline ile karşılaştır
+    python benchmark_parsers.py --save-baseline  # mevcut sonuçları baseline olarak kaydet
+
+Her backend için sayfa/saniye, satır başına parse süresi ve bellek kullanımı
+raporlanır. Bellek değeri sadece Python heap'idir (tracemalloc): lxml'in
+C tarafında (libxml2) ayırdığı bellek bu sayıya girmez. Mutlak sayfa/saniye
+makineye bağlı olduğundan sadece bilgi amaçlıdır; kontrol, aynı turda ölçülen
+REFERENCE_BACKEND'e göre hız oranıyla yapılır. Oran baseline'dakinden
+--tolerance oranından fazla düşerse script 1 ile çıkar.
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+from page_parsers import PARSERS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASELINE_FILE = os.path.join(FIXTURES_DIR, 'benchmark_baseline.json')
+# Saf Python fallback; diğer backend'lerin hızı buna oranla karşılaştırılır
+REFERENCE_BACKEND = 'bs4'
+
+
+def load_corpus():
+    """(kind, name, html) tuples for every fixture page"""
+    corpus = []
+    for kind in ('search', 'detail'):
+        folder = os.path.join(FIXTURES_DIR, kind)
+        for name in sorted(os.listdir(folder)):
+            if name.endswith('.html'):
+                with open(os.path.join(folder, name), 'r', encoding='utf-8') as f:
+                    corpus.append((kind, name, f.read()))
+    return corpus
+
+
+def parse_page(parser, kind, html):
+    """Parse one page, returns the number of extracted rows"""
+    if kind == 'search':
+        return len(parser.parse_listings(html, 'benchmark'))
+    info = parser.parse_damage_info(html)
+    if info is None:
+        return 0
+    return info['painted_count'] + info['replaced_count'] + info['local_painted_count']
+
+
+def benchmark(parser, corpus, iterations, repeats=5):
+    # Isınma turu
+    for kind, _, html in corpus:
+        parse_page(parser, kind, html)
+
+    # En hızlı tur alınır, arka plandaki yük ölçümü daha az bozar
+    elapsed = None
+    for _ in range(repeats):
+        pages = rows = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for kind, _, html in corpus:
+                rows += parse_page(parser, kind, html)
+                pages += 1
+        took = time.perf_counter() - start
+        elapsed = took if elapsed is None else min(elapsed, took)
+
+    # Bellek ölçümü ayrı turda, tracemalloc süreyi bozmasın
+    tracemalloc.start()
+    for kind, _, html in corpus:
+        parse_page(parser, kind, html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'pages': pages,
+        'rows': rows,
+        'seconds': round(elapsed, 4),
+        'pages_per_sec': round(pages / elapsed, 1),
+        'row_latency_ms': round(elapsed / rows * 1000, 4) if rows else None,
+        'python_heap_peak_kb': round(peak / 1024, 1)
+    }
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the HTML parser backends on the fixture corpus')
+    parser.add_argument('--iterations', type=int, default=50, help='passes over the corpus per backend')
+    parser.add_argument('--backend', choices=sorted(PARSERS), action='append', help='only benchmark these backends')
+    parser.add_argument('--repeats', type=int, default=5, help='timed rounds per backend, the fastest one counts')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help=f'allowed drop of the speed relative to {REFERENCE_BACKEND} against the baseline (0.3 = %%30)')
+    parser.add_argument('--save-baseline', action='store_true', help=f'write the results to {os.path.basename(BASELINE_FILE)}')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    baseline = load_baseline()
+    results = {}
+    regressions = []
+
+    print(f"Corpus: {sum(1 for c in corpus if c[0] == 'search')} search, "
+          f"{sum(1 for c in corpus if c[0] == 'detail')} detail pages, {args.iterations} iterations")
+
+    for name in args.backend or sorted(PARSERS):
+        try:
+            backend = PARSERS[name]()
+        except ImportError as e:
+            print(f"- {name}: skipped ({e})")
+            continue
+
+        result = benchmark(backend, corpus, args.iterations, args.repeats)
+        results[name] = result
+
+    reference = results.get(REFERENCE_BACKEND)
+    if reference is None:
+        print(f"{REFERENCE_BACKEND} not available, relative speed is not checked")
+
+    for name, result in results.items():
+        line = (f"{name:>5}: {result['pages_per_sec']:>8.1f} pages/s | {result['row_latency_ms']} ms/row | "
+                f"Python heap peak {result['python_heap_peak_kb']} KB")
+
+        expected = baseline.get(name, {}).get('relative_speed')
+        if reference is not None:
+            result['relative_speed'] = round(result['pages_per_sec'] / reference['pages_per_sec'], 3)
+            line += f" | x{result['relative_speed']} {REFERENCE_BACKEND}"
+
+        if name != REFERENCE_BACKEND and reference is not None and expected:
+            change = (result['relative_speed'] - expected) / expected
+            line += f" (baseline x{expected}, {change:+.0%})"
+            if change < -args.tolerance:
+                regressions.append(name)
+                line = '✗ ' + line
+            else:
+                line = '✓ ' + line
+        else:
+            line = '- ' + line
+        print(line)
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Baseline saved to {BASELINE_FILE}")
+        return 0
+
+    if regressions:
+        print(f"Throughput regression relative to {REFERENCE_BACKEND}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+"""
+Marka bazında kontrol aralığı/öncelik zamanlayıcısı ve detay sayfası sıralaması
+"""
+import time
+from bisect import bisect_left
+
+from listing_fields import parse_int, parse_price_tl
+
+
+class BrandScheduler:
+    """
+    Her marka kendi interval_minutes'ına göre (yoksa check_interval_minutes)
+    vadesi gelince çalışır. Aynı anda vadesi gelen markalardan priority'si
+    yüksek olan, eşitse en çok geciken önce seçilir. Kendi aralığından daha
+    uzun süre geciken marka priority'ye bakılmadan öne alınır; böylece düşük
+    öncelikli markalar yüksek öncelikli olanların arkasında sonsuza kadar beklemez.
+    """
+
+    def __init__(self, default_interval_minutes=30):
+        self.default_interval_minutes = default_interval_minutes
+        self.last_checked = {}
+        # Hiç taranmamış markaların ilk vadesinin geldiği an (gecikme hesabı için)
+        self.first_due = {}
+
+    def interval_seconds(self, brand):
+        return float(brand.get('interval_minutes', self.default_interval_minutes)) * 60
+
+    def next_due(self, brand):
+        last = self.last_checked.get(brand.get('name', 'Unknown'))
+        if last is None:
+            return 0
+        return last + self.interval_seconds(brand)
+
+    def lateness(self, brand, now=None):
+        """How many of its own intervals the brand has been overdue"""
+        now = now or time.time()
+        name = brand.get('name', 'Unknown')
+        due_since = self.next_due(brand) if name in self.last_checked else self.first_due.setdefault(name, now)
+        return max(0, now - due_since) / max(1, self.interval_seconds(brand))
+
+    def due_brands(self, brands, now=None):
+        """
+        Brands whose interval has elapsed, most urgent first: brands overdue by
+        a full interval or more (most overdue first), then by priority
+        """
+        now = now or time.time()
+        due = [brand for brand in brands if self.next_due(brand) <= now]
+        starving = sorted((brand for brand in due if self.lateness(brand, now) >= 1),
+                          key=lambda brand: -self.lateness(brand, now))
+        rest = sorted((brand for brand in due if self.lateness(brand, now) < 1),
+                      key=lambda brand: (-brand.get('priority', 0), self.next_due(brand)))
+        return starving + rest
+
+    def seconds_until_next(self, brands, now=None):
+        if not brands:
+            return None
+        now = now or time.time()
+        return max(0, min(self.next_due(brand) for brand in brands) - now)
+
+    def mark_checked(self, brand_name, when=None):
+        self.last_checked[brand_name] = when or time.time()
+
+    def snapshot(self, brands):
+        return {
+            brand.get('name', 'Unknown'): {
+                'priority': brand.get('priority', 0),
+                'interval_minutes': self.interval_seconds(brand) / 60,
+                'last_checked': self.last_checked.get(brand.get('name', 'Unknown')),
+                'next_due': self.next_due(brand) or None
+            }
+            for brand in brands
+        }
+
+
+def by_priority(brands):
+    """Config order within equal priority, higher priority first"""
+    return sorted(brands, key=lambda brand: -brand.get('priority', 0))
+
+
+def order_listings(listings, order=None):
+    """
+    Order unseen rows for detail fetching. order = {'by': 'page'|'price'|'km',
+    'freshness_weight': 0..1}. Rows keep their search-page position as the
+    freshness rank (newest first on date-sorted searches); with by=price/km
+    the final rank blends freshness and cheapness. Rows without a value go last.
+    """
+    order = order or {}
+    by = order.get('by', 'page')
+    if by not in ('price', 'km') or len(listings) < 2:
+        return list(listings)
+
+    weight = float(order.get('freshness_weight', 0.5))
+    if by == 'price':
+        values = [listing.get('price_tl', parse_price_tl(listing.get('price'))) for listing in listings]
+    else:
+        values = [listing.get('km_value', parse_int(listing.get('km'))) for listing in listings]
+    known = sorted(value for value in values if value is not None)
+    last = max(1, len(listings) - 1)
+
+    def score(item):
+        position, value = item
+        freshness_rank = position / last
+        if value is None:
+            value_rank = 1.0
+        else:
+            value_rank = bisect_left(known, value) / max(1, len(known) - 1)
+        return weight * freshness_rank + (1 - weight) * value_rank
+
+    ranked = sorted(enumerate(values), key=score)
+    return [listings[position] for position, _ in ranked]
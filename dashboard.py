@@ -1,12 +1,19 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, render_template, jsonify, request, redirect, url_for
+from flask_socketio import SocketIO, emit, join_room
 import json
 import os
 import threading
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 import subprocess
 import sys
+from filters import get_thresholds, evaluate_listing, refilter
+from listing_store import ListingStore
+from live_feed import ROOMS, LiveWatcher
+from log_tail import log_id, read_since, tail
+from metrics import render_prometheus
+from scraper_ipc import load_authkey, send_command
+from werkzeug.http import is_resource_modified
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'sahibinden-scraper-secret-2024'
@@ -16,6 +23,10 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 scraper_process = None
 scraper_thread = None
 scraper_running = False
+# "Şimdi çalıştır" ile açılan tek turluk süreç (komut kanalı yok, ping'e cevap vermez)
+once_process = None
+# IPC 'stop' sonrası scraper'ın turunu bitirmesi için beklenen süre, sonra SIGTERM
+STOP_TIMEOUT_SECONDS = 120
 
 # Data directory
 DATA_DIR = '/app/data' if os.path.exists('/app/data') else '.'
@@ -25,61 +36,137 @@ LOG_FILE = 'sahibinden_scraper.log'
 COOKIES_FILE = os.path.join(DATA_DIR, 'sahibinden_cookies.json')
 STATUS_FILE = os.path.join(DATA_DIR, 'scraper_status.json')
 OTP_FILE = os.path.join(DATA_DIR, 'otp_code.json')
+DB_FILE = os.path.join(DATA_DIR, 'sahibinden.db')
+METRICS_FILE = os.path.join(DATA_DIR, 'metrics.json')
+EVENTS_FILE = os.path.join(DATA_DIR, 'events.jsonl')
+# Scraper ile aynı data klasöründeki anahtar (ilk açan süreç oluşturur)
+IPC_AUTHKEY = load_authkey(DATA_DIR)
 
-def load_config():
-    """Load config.json"""
+# İlan geçmişi SQLite'ta; eski filtered_listings.json ilk açılışta içe aktarılır
+listing_store = ListingStore(DB_FILE, legacy_json_file=LISTINGS_FILE)
+
+def file_signature(path):
+    """(mtime, size, inode) of a file, None if it does not exist"""
     try:
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        return {
-            'check_interval_minutes': 30,
-            'max_replaced_parts': 1,
-            'max_painted_parts': 2,
-            'brands': []
-        }
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+class DataCache:
+    """
+    Parse edilmiş config/status/metrik/ilan verisini bellekte tutar. Her değer
+    bir imzayla (dosya mtime/size, ilan veritabanı sürümü) saklanır; imza
+    değişince yeniden yüklenir. SocketIO thread'leri arasında paylaşılır.
+    Dönen nesneler paylaşımlıdır, değiştirmeden önce kopyalanmalı.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, signature, loader, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == signature:
+                return entry[1]
+        if signature is None:
+            return default
+
+        try:
+            value = loader()
+        except Exception:
+            # Yarım yazılmış dosya vb. - varsa bir önceki değer kullanılır, sonraki istekte tekrar denenir
+            return entry[1] if entry else default
+
+        with self._lock:
+            self._entries[key] = (signature, value)
+        return value
+
+    def get_file(self, path, loader, default=None):
+        return self.get(path, file_signature(path), lambda: loader(path), default)
+
+data_cache = DataCache()
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_config():
+    """Load config.json (cached, copy before modifying)"""
+    return data_cache.get_file(CONFIG_FILE, read_json, default={
+        'check_interval_minutes': 30,
+        'max_replaced_parts': 1,
+        'max_painted_parts': 2,
+        'brands': []
+    })
 
 def save_config(config):
     """Save config.json"""
     with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
         json.dump(config, f, ensure_ascii=False, indent=2)
 
-def load_listings():
-    """Load filtered listings"""
-    try:
-        if os.path.exists(LISTINGS_FILE):
-            with open(LISTINGS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
-    except:
-        return []
-
-def get_logs(limit=100):
-    """Get last N lines from log file"""
-    try:
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                return lines[-limit:]
-        return []
-    except:
-        return []
+def cached_listings(key, loader):
+    """Listing store reads that only change when the store's data version does"""
+    return data_cache.get(f'listings:{key}', listing_store.version(), loader)
+
+def get_listing_filters():
+    """Read pagination/filter query params shared by listing routes"""
+    page = max(1, request.args.get('page', 1, type=int))
+    limit = min(200, max(1, request.args.get('limit', 50, type=int)))
+    status = request.args.get('status', 'accepted')
+    accepted = {'accepted': True, 'rejected': False}.get(status)
+    brand = request.args.get('brand') or None
+    return page, limit, status, accepted, brand
+
+def get_listing_query():
+    """Read ?sort=price|km|year|found_at ('-' prefix for descending) and typed-field filters"""
+    sort = request.args.get('sort', '-found_at').replace('found-at', 'found_at')
+    if sort.lstrip('-') not in ListingStore.SORT_COLUMNS:
+        sort = '-found_at'
+    filters = {}
+    for key in ListingStore.RANGE_FILTERS:
+        value = request.args.get(key, type=int)
+        if value is not None:
+            filters[key] = value
+    if request.args.get('city'):
+        filters['city'] = request.args['city']
+    return sort, filters
+
+def read_logs(limit=100, since=None, current_log_id=None):
+    """
+    Last `limit` lines, or only the lines written after byte offset `since`.
+    The returned offset/log_id are passed back by the client on the next
+    call; a different log_id (rotated file) or a shrunk file gives reset=True.
+    """
+    current = log_id(LOG_FILE)
+    if since is None or (current_log_id is not None and current_log_id != current):
+        lines, offset = tail(LOG_FILE, limit)
+        reset = True
+    else:
+        lines, offset, reset = read_since(LOG_FILE, since, limit)
+    return {'logs': lines, 'from': None if reset else since, 'offset': offset, 'log_id': current, 'reset': reset}
 
 def load_status():
-    """Read scraper status shared file"""
-    default = {
+    """Read scraper status shared file (cached, copy before modifying)"""
+    return data_cache.get_file(STATUS_FILE, read_json, default={
         'running': False,
         'login_waiting': False,
         'message': '',
         'timestamp': None
+    })
+
+def load_metrics():
+    return data_cache.get_file(METRICS_FILE, read_json, default={})
+
+def status_summary():
+    """Status fields the dashboard shows live"""
+    status = load_status()
+    return {
+        'scraper_running': bool(scraper_running or status.get('running', False)),
+        'login_waiting': status.get('login_waiting', False),
+        'status_message': status.get('message', '')
     }
-    try:
-        if os.path.exists(STATUS_FILE):
-            with open(STATUS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return default
-    except Exception:
-        return default
 
 def write_status(status):
     """Write scraper status file (best-effort)"""
@@ -106,14 +193,14 @@ def scraper_background_task():
 def index():
     """Dashboard home page"""
     config = load_config()
-    listings = load_listings()
-    logs = get_logs(50)
+    listings = cached_listings('recent', lambda: listing_store.query(accepted=True, limit=10))
+    logs = read_logs(50)
     status = load_status()
 
     stats = {
         'total_brands': len(config.get('brands', [])),
         'enabled_brands': len([b for b in config.get('brands', []) if b.get('enabled', True)]),
-        'total_listings': len(listings),
+        'total_listings': cached_listings('accepted_count', lambda: listing_store.count(accepted=True)),
         'scraper_running': scraper_running or status.get('running', False),
         'check_interval': config.get('check_interval_minutes', 30),
         'max_replaced': config.get('max_replaced_parts', 1),
@@ -123,13 +210,15 @@ def index():
         'status_message': status.get('message', '')
     }
 
-    return render_template('index.html', stats=stats, listings=listings[:10], logs=logs)
+    return render_template('index.html', stats=stats, listings=listings, logs=logs['logs'], log_cursor=logs)
 
 @app.route('/api/config', methods=['GET', 'POST'])
 def api_config():
     """Get or update config"""
     if request.method == 'POST':
-        config = request.json
+        # Formda olmayan anahtarlar (detail_workers vb.) kaybolmasın
+        config = dict(load_config())
+        config.update(request.json)
         save_config(config)
         return jsonify({'success': True, 'message': 'Configuration saved'})
     else:
@@ -137,26 +226,104 @@ def api_config():
 
 @app.route('/api/listings')
 def api_listings():
-    """Get all listings"""
-    return jsonify(load_listings())
+    """
+    Get listings page by page (?page=&limit=&status=accepted|rejected|all&brand=
+    &sort=&min_price=&max_price=&min_km=&max_km=&min_year=&max_year=&city=).
+    ETag/Last-Modified follow the store's data version, unchanged data -> 304.
+    """
+    version, updated_at = listing_store.version()
+    etag = f'listings-{version}'
+    last_modified = datetime.fromtimestamp(updated_at or 0, timezone.utc)
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        page, limit, status, accepted, brand = get_listing_filters()
+        sort, filters = get_listing_query()
+        response = jsonify({
+            'listings': listing_store.query(accepted=accepted, brand=brand, limit=limit,
+                                            offset=(page - 1) * limit, sort=sort, filters=filters),
+            'total': listing_store.count(accepted=accepted, brand=brand, filters=filters),
+            'page': page,
+            'limit': limit,
+            'sort': sort
+        })
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Tarayıcı her seferinde doğrulasın (cevap 304 ise gövde gelmez)
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/api/refilter', methods=['POST'])
+def api_refilter():
+    """Re-apply thresholds to stored listings without scraping"""
+    try:
+        thresholds = get_thresholds(load_config())
+        data = request.get_json(force=True, silent=True) or {}
+        for key in thresholds:
+            if data.get(key) is not None:
+                thresholds[key] = int(data[key])
+
+        stored = listing_store.all_parsed()
+        accepted = refilter(stored, thresholds['max_replaced_parts'], thresholds['max_painted_parts'])
+        if data.get('save'):
+            listing_store.set_decisions(
+                (listing['id'], *evaluate_listing(listing, thresholds['max_replaced_parts'], thresholds['max_painted_parts']))
+                for listing in stored
+            )
+        return jsonify({
+            'success': True,
+            'total': len(stored),
+            'count': len(accepted),
+            'thresholds': thresholds,
+            'listings': accepted
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/logs')
 def api_logs():
-    """Get logs"""
-    limit = request.args.get('limit', 100, type=int)
-    return jsonify({'logs': get_logs(limit)})
+    """Get logs (?limit=, ?since=<offset>&log_id= for only the new lines)"""
+    limit = min(1000, max(1, request.args.get('limit', 100, type=int)))
+    return jsonify(read_logs(limit, request.args.get('since', type=int), request.args.get('log_id', type=int)))
+
+@app.route('/api/events')
+def api_events():
+    """
+    Structured scraper events from events.jsonl (?limit=&event=listing_decision
+    &since=<offset>&log_id= for only the events written after the last call)
+    """
+    limit = min(1000, max(1, request.args.get('limit', 100, type=int)))
+    since = request.args.get('since', type=int)
+    current = log_id(EVENTS_FILE)
+    if since is None or request.args.get('log_id', current, type=int) != current:
+        lines, offset = tail(EVENTS_FILE, limit)
+        reset = True
+    else:
+        lines, offset, reset = read_since(EVENTS_FILE, since, limit)
+
+    event_type = request.args.get('event')
+    events = []
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if not event_type or event.get('event') == event_type:
+            events.append(event)
+    return jsonify({'events': events, 'offset': offset, 'log_id': current, 'reset': reset})
 
 @app.route('/api/stats')
 def api_stats():
     """Get current stats"""
     config = load_config()
-    listings = load_listings()
     status = load_status()
 
     return jsonify({
         'total_brands': len(config.get('brands', [])),
         'enabled_brands': len([b for b in config.get('brands', []) if b.get('enabled', True)]),
-        'total_listings': len(listings),
+        'total_listings': cached_listings('accepted_count', lambda: listing_store.count(accepted=True)),
         'scraper_running': scraper_running or status.get('running', False),
         'check_interval': config.get('check_interval_minutes', 30),
         'login_waiting': status.get('login_waiting', False),
@@ -165,13 +332,44 @@ def api_stats():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint (scraper writes the snapshot after each cycle)"""
+    body = render_prometheus(load_metrics())
+    last_cycle = load_status().get('last_cycle')
+    if last_cycle:
+        body += '# TYPE sahibinden_last_cycle_duration_seconds gauge\n'
+        body += f"sahibinden_last_cycle_duration_seconds {last_cycle['duration_seconds']}\n"
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+def process_running(process):
+    return process is not None and process.poll() is None
+
+def stop_process(process, timeout):
+    """
+    Give the scraper `timeout` seconds to exit on its own, then SIGTERM it.
+    The scraper turns SIGTERM into a normal exit, so notifiers are flushed,
+    browsers are closed and the status is written.
+    """
+    try:
+        process.wait(timeout)
+        return
+    except subprocess.TimeoutExpired:
+        process.terminate()
+    try:
+        process.wait(60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
 @app.route('/api/scraper/start', methods=['POST'])
 def start_scraper():
-    """Start scraper in background"""
+    """Start resident scraper in background"""
     global scraper_thread, scraper_running
 
-    if scraper_running:
+    if scraper_running or send_command('ping', IPC_AUTHKEY):
         return jsonify({'success': False, 'message': 'Scraper is already running'})
+    if process_running(once_process):
+        return jsonify({'success': False, 'message': 'A manual scrape is still running'})
 
     scraper_running = True
     scraper_thread = threading.Thread(target=scraper_background_task, daemon=True)
@@ -181,20 +379,33 @@ def start_scraper():
 
 @app.route('/api/scraper/stop', methods=['POST'])
 def stop_scraper():
-    """Stop scraper"""
-    global scraper_running, scraper_process
-    scraper_running = False
-    if scraper_process:
-        scraper_process.terminate()
-        scraper_process = None
-    return jsonify({'success': True, 'message': 'Scraper stopped'})
+    """Stop scraper (the resident one after its current cycle)"""
+    global scraper_running
+    send_command('stop', IPC_AUTHKEY)
+    # scraper_running, süreç gerçekten çıkınca scraper_background_task içinde düşer
+    if process_running(scraper_process):
+        threading.Thread(target=stop_process, args=(scraper_process, STOP_TIMEOUT_SECONDS), daemon=True).start()
+    else:
+        scraper_running = False
+    if process_running(once_process):
+        # Tek turluk sürecin komut kanalı yok, SIGTERM ile düzgün kapanır
+        threading.Thread(target=stop_process, args=(once_process, 0), daemon=True).start()
+    return jsonify({'success': True, 'message': 'Scraper stopping'})
 
 @app.route('/api/scraper/run-now', methods=['POST'])
 def run_scraper_now():
     """Run scraper once manually"""
+    global once_process
     try:
-        # Run scraper in background
-        subprocess.Popen([sys.executable, 'sahibinden_scraper.py'])
+        # Sürekli çalışan scraper varsa ısınmış oturumla hemen başlasın
+        reply = send_command('run-now', IPC_AUTHKEY)
+        if reply is not None:
+            return jsonify(reply)
+
+        # Yoksa tek turluk ayrı süreç başlat (aynı anda tek scraper süreci)
+        if scraper_running or process_running(once_process):
+            return jsonify({'success': False, 'message': 'Scraper is already running'})
+        once_process = subprocess.Popen([sys.executable, 'sahibinden_scraper.py', 'once'])
         return jsonify({'success': True, 'message': 'Manual scrape started'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -212,7 +423,7 @@ def upload_cookie():
 
         # Save cookie file
         cookie_file.save(COOKIES_FILE)
-        status = load_status()
+        status = dict(load_status())
         status['message'] = f"New cookies uploaded at {datetime.now().isoformat()}"
         write_status(status)
 
@@ -236,7 +447,7 @@ def submit_otp():
         with open(OTP_FILE, 'w', encoding='utf-8') as f:
             json.dump(payload, f, ensure_ascii=False, indent=2)
 
-        status = load_status()
+        status = dict(load_status())
         status['message'] = f"OTP submitted at {payload['timestamp']}"
         write_status(status)
 
@@ -253,14 +464,25 @@ def config_page():
 @app.route('/listings')
 def listings_page():
     """Listings viewer page"""
-    listings = load_listings()
-    return render_template('listings.html', listings=listings)
+    page, limit, status, accepted, brand = get_listing_filters()
+    sort, filters = get_listing_query()
+    listings = listing_store.query(accepted=accepted, brand=brand, limit=limit, offset=(page - 1) * limit,
+                                   sort=sort, filters=filters)
+    total = listing_store.count(accepted=accepted, brand=brand, filters=filters)
+    pages = max(1, (total + limit - 1) // limit)
+    # Sayfa linklerinde sıralama ve filtreler korunsun
+    query_args = dict(filters, status=status, brand=brand, sort=sort)
+    return render_template('listings.html', listings=listings, total=total, page=page, pages=pages,
+                           status=status, brand=brand, query_args=query_args)
 
 @app.route('/logs')
 def logs_page():
     """Logs viewer page"""
-    logs = get_logs(200)
-    return render_template('logs.html', logs=logs)
+    logs = read_logs(200)
+    return render_template('logs.html', logs=logs['logs'], log_cursor=logs)
+
+# Log/durum/ilan değişikliklerini tek bir izleyici odalara iter
+live_watcher = LiveWatcher(socketio, LOG_FILE, status_summary, listing_store)
 
 # WebSocket for real-time log streaming
 @socketio.on('connect')
@@ -268,11 +490,39 @@ def handle_connect():
     """Client connected"""
     emit('connected', {'data': 'Connected to log stream'})
 
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """
+    Join live rooms (data: {rooms: ['logs', 'status', 'listings'], since, log_id}).
+    Lines written after the client's log cursor are sent once, later changes
+    arrive as broadcasts.
+    """
+    data = data if isinstance(data, dict) else {}
+    rooms = [room for room in data.get('rooms', ROOMS) if room in ROOMS]
+    for room in rooms:
+        join_room(room)
+    live_watcher.subscribe(request.sid, rooms)
+
+    if 'logs' in rooms and isinstance(data.get('since'), int):
+        current_log_id = data.get('log_id')
+        emit('logs_update', read_logs(50, data['since'], current_log_id if isinstance(current_log_id, int) else None))
+    if 'status' in rooms:
+        emit('status_update', status_summary())
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    live_watcher.unsubscribe(request.sid)
+
 @socketio.on('request_logs')
-def handle_request_logs():
-    """Send logs to client"""
-    logs = get_logs(50)
-    emit('logs_update', {'logs': logs})
+def handle_request_logs(data=None):
+    """Send logs to client (data: {since, log_id} for only the new lines), used to resync after a gap"""
+    data = data if isinstance(data, dict) else {}
+    since, current_log_id = data.get('since'), data.get('log_id')
+    emit('logs_update', read_logs(
+        50,
+        since if isinstance(since, int) else None,
+        current_log_id if isinstance(current_log_id, int) else None
+    ))
 
 if __name__ == '__main__':
     # Start Flask with SocketIO (production mode)
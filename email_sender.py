@@ -5,8 +5,11 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
+import threading
 from dotenv import load_dotenv
 
+from listing_fields import format_location
+
 load_dotenv()
 
 
@@ -17,6 +20,37 @@ class EmailSender:
         self.user = os.getenv('EMAIL_USER', '')
         self.password = os.getenv('EMAIL_PASSWORD', '')
         self.to_email = os.getenv('TO_EMAIL', '')
+        # SMTP bağlantısı gönderimler arasında açık tutulur (STARTTLS + login her seferinde tekrarlanmaz)
+        self._server = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        """Reuse the open SMTP connection if the server still answers NOOP"""
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close_connection()
+
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        server.starttls()
+        server.login(self.user, self.password)
+        self._server = server
+        return server
+
+    def _close_connection(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def close(self):
+        with self._lock:
+            self._close_connection()
     
     def send_listings_email(self, listings):
         """
@@ -46,10 +80,13 @@ class EmailSender:
             msg.attach(part1)
             msg.attach(part2)
             
-            with smtplib.SMTP(self.host, self.port) as server:
-                server.starttls()
-                server.login(self.user, self.password)
-                server.send_message(msg)
+            with self._lock:
+                try:
+                    self._connection().send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # NOOP'tan sonra kopmuş olabilir, yeni bağlantıyla bir kez daha dene
+                    self._close_connection()
+                    self._connection().send_message(msg)
             
             print(f"{len(listings)} ilan için e-posta gönderildi!")
             return True
@@ -156,7 +193,7 @@ class EmailSender:
             km = listing.get('km', 'N/A')
             brand = listing.get('brand', 'N/A')
             color = listing.get('color', 'N/A')
-            location = listing.get('location', 'N/A')
+            location = format_location(listing)
             damage_info = listing.get('damage_info', {})
             painted_count = damage_info.get('painted_count', 0)
             replaced_count = damage_info.get('replaced_count', 0)
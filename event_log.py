@@ -0,0 +1,55 @@
+"""
+Yapılandırılmış olay kaydı - her satır tek bir JSON nesnesi (events.jsonl)
+"""
+import json
+import logging
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+
+class EventLog:
+    """
+    İlan kararları, sayfa istekleri, rate limit ve tur özetleri için
+    append-only JSON-lines dosyası; boyut sınırında döndürülür (.1, .2 ...).
+    Her satırda 'ts' (epoch), 'time' ve 'event' alanları bulunur. Thread'ler
+    arasında paylaşılabilir, yazma handler'ın kilidiyle yapılır.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5, enabled=True):
+        self.path = path
+        self._handler = None
+        if enabled:
+            # Root logger'a bağlanmaz, olaylar sahibinden_scraper.log'a düşmez
+            self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            self._handler.setFormatter(logging.Formatter('%(message)s'))
+
+    @classmethod
+    def from_config(cls, path, config):
+        """config['event_log'] = {'enabled': true, 'max_mb': 10, 'backups': 5}"""
+        options = config.get('event_log', {})
+        return cls(
+            path,
+            max_bytes=int(options.get('max_mb', 10) * 1024 * 1024),
+            backup_count=options.get('backups', 5),
+            enabled=options.get('enabled', True)
+        )
+
+    def emit(self, event, **fields):
+        if not self._handler:
+            return
+        now = time.time()
+        line = json.dumps({
+            'ts': round(now, 3),
+            'time': datetime.fromtimestamp(now).isoformat(timespec='milliseconds'),
+            'event': event,
+            **fields
+        }, ensure_ascii=False, default=str)
+        try:
+            self._handler.handle(logging.makeLogRecord({'msg': line, 'levelno': logging.INFO, 'levelname': 'INFO'}))
+        except Exception as e:
+            logging.warning(f"Could not write {event} event: {e}")
+
+    def close(self):
+        if self._handler:
+            self._handler.close()
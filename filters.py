@@ -0,0 +1,92 @@
+"""
+İlan filtreleme kuralları - scraper ve dashboard aynı kuralları kullanır
+"""
+from listing_fields import parse_int, parse_price_tl, parse_year
+
+PREFILTER_KEYS = ('max_price', 'max_km', 'min_year', 'excluded_cities', 'title_blacklist')
+
+
+def get_thresholds(config):
+    """Read part-count thresholds from a config dict"""
+    return {
+        'max_replaced_parts': config.get('max_replaced_parts', 1),
+        'max_painted_parts': config.get('max_painted_parts', 2)
+    }
+
+
+def evaluate_listing(listing, max_replaced_parts, max_painted_parts):
+    """
+    Hasar bilgisine göre ilanı değerlendirir.
+    Returns (accepted, reason) - reason is None for accepted listings.
+    """
+    damage_info = listing.get('damage_info') or {}
+
+    # Kaput hasarlı ise direkt reddet
+    if damage_info.get('hood_damaged'):
+        return False, f"kaput {damage_info.get('hood_damage_type')}"
+
+    if damage_info.get('replaced_count', 0) > max_replaced_parts:
+        return False, 'replaced parts exceeded'
+
+    if damage_info.get('painted_count', 0) > max_painted_parts:
+        return False, 'painted parts exceeded'
+
+    return True, None
+
+
+def refilter(listings, max_replaced_parts, max_painted_parts):
+    """Re-apply thresholds to already parsed listings, returns the accepted ones"""
+    return [
+        listing for listing in listings
+        if listing.get('damage_info') is not None
+        and evaluate_listing(listing, max_replaced_parts, max_painted_parts)[0]
+    ]
+
+
+def fold_tr(text):
+    """Türkçe kurallara göre küçük harf (İ -> i, I -> ı)"""
+    return str(text or '').replace('İ', 'i').replace('I', 'ı').lower()
+
+
+def get_prefilter(config, brand=None):
+    """Global 'prefilter' rules, overridden key by key by the brand's own 'prefilter'"""
+    rules = dict(config.get('prefilter') or {})
+    if brand:
+        rules.update(brand.get('prefilter') or {})
+    return {key: value for key, value in rules.items() if key in PREFILTER_KEYS and value not in (None, '', [])}
+
+
+def prefilter_listing(listing, rules):
+    """
+    Arama satırındaki alanlarla (fiyat, km, yıl, konum, başlık) ilanı detay
+    sayfası açılmadan eler. Returns (passed, reason). Değeri okunamayan
+    alanlar elemeye sebep olmaz.
+    """
+    if not rules:
+        return True, None
+
+    # Tipli alanlar get_listings'te dolduruluyor; eski kayıtlar için metinden parse edilir
+    price = listing['price_tl'] if 'price_tl' in listing else parse_price_tl(listing.get('price'))
+    if 'max_price' in rules and price is not None and price > rules['max_price']:
+        return False, f"prefilter: price {price} > {rules['max_price']}"
+
+    km = listing['km_value'] if 'km_value' in listing else parse_int(listing.get('km'))
+    if 'max_km' in rules and km is not None and km > rules['max_km']:
+        return False, f"prefilter: km {km} > {rules['max_km']}"
+
+    year = listing['year_value'] if 'year_value' in listing else parse_year(listing.get('year'))
+    if 'min_year' in rules and year is not None and year < rules['min_year']:
+        return False, f"prefilter: year {year} < {rules['min_year']}"
+
+    city = fold_tr(listing.get('city'))
+    location = fold_tr(listing.get('location'))
+    for excluded in rules.get('excluded_cities', []):
+        if (city == fold_tr(excluded)) if city else location.startswith(fold_tr(excluded)):
+            return False, f"prefilter: city {excluded}"
+
+    title = fold_tr(listing.get('title'))
+    for keyword in rules.get('title_blacklist', []):
+        if fold_tr(keyword) in title:
+            return False, f"prefilter: title contains '{keyword}'"
+
+    return True, None
@@ -0,0 +1,145 @@
+"""
+Chrome açmadan sayfa çekmek için hafif HTTP istemcisi
+"""
+import json
+import logging
+import os
+import re
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# fetch() sonuçları. Sadece BLOCKED ve UNAVAILABLE tarayıcıya düşmeyi gerektirir;
+# EMPTY geçerli ama içeriksiz sayfa (boş arama, kalkmış ilan), ERROR geçici hata (5xx, timeout)
+OK = 'ok'
+EMPTY = 'empty'
+ERROR = 'error'
+BLOCKED = 'blocked'
+UNAVAILABLE = 'unavailable'
+
+
+class HttpFetcher:
+    """
+    Kayıtlı cookie'ler ve tarayıcıyla aynı user agent ile pooled requests.Session.
+    Cloudflare, login veya rate limit sayfası görürse BLOCKED döner; çağıran taraf
+    sadece bu durumda (ve HTTP kullanılamıyorsa) tarayıcıya düşer.
+    """
+
+    # Sadece ready_marker yoksa bakılır. Cloudflare normal sayfalara da
+    # challenge-platform script'i ekliyor, bu yüzden sayfanın yapısına bakılır
+    # (tarayıcı tarafındaki page_readiness ile aynı işaretler)
+    BLOCK_PATTERNS = (
+        re.compile(r'class=["\'][^"\']*\btoo-many-requests\b'),
+        re.compile(r'id=["\']btn-continue["\']'),
+    )
+
+    def __init__(self, cookies_file, user_agent, pool_size=10, timeout=20, cooldown_seconds=600,
+                 on_success=None, on_block=None):
+        self.cookies_file = cookies_file
+        # Rate controller'a başarılı/bloklanan istekleri bildirmek için
+        self.on_success = on_success
+        self.on_block = on_block
+        self.timeout = timeout
+        self.cooldown_seconds = cooldown_seconds
+        self.blocked_until = 0
+        self._cookies_mtime = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7',
+        })
+
+    def reload_cookies_if_changed(self):
+        """Load sahibinden_cookies.json into the session when the file changed"""
+        if not os.path.exists(self.cookies_file):
+            return False
+
+        mtime = os.path.getmtime(self.cookies_file)
+        if mtime == self._cookies_mtime:
+            return True
+
+        try:
+            with open(self.cookies_file, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
+        except Exception as e:
+            logging.debug(f"Could not read cookies for HTTP session: {e}")
+            return False
+
+        self.session.cookies.clear()
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain'),
+                path=cookie.get('path', '/')
+            )
+        self._cookies_mtime = mtime
+        # Yeni cookie geldiyse önceki bloğu unut
+        self.blocked_until = 0
+        logging.info(f"HTTP session loaded {len(cookies)} cookies")
+        return True
+
+    def block_reason(self, response):
+        """
+        'login' or 'blocked' for a response that did not contain the expected
+        page, None if it is just an unexpected page
+        """
+        final_url = response.url.lower()
+        if 'login' in final_url or 'secure.sahibinden.com' in final_url:
+            return 'login'
+        if 'twoFactorAuthenticationForm' in response.text:
+            return 'login'
+        if 'olagan-disi-kullanim' in final_url or response.status_code in (403, 429, 503):
+            return 'blocked'
+        if any(pattern.search(response.text) for pattern in self.BLOCK_PATTERNS):
+            return 'blocked'
+        return None
+
+    def is_available(self):
+        """False while cooling down after a block or when there are no cookies"""
+        return time.time() >= self.blocked_until and os.path.exists(self.cookies_file)
+
+    def fetch(self, url, ready_marker):
+        """
+        Sayfayı HTTP ile çeker, (result, html) döner. html sadece OK iken dolu.
+        OK: ready_marker var. BLOCKED: login/Cloudflare/rate limit sayfası.
+        EMPTY: engel yok ama marker da yok (2xx veya 404/410). ERROR: 5xx,
+        diğer hata kodları veya bağlantı hatası. UNAVAILABLE: cooldown/cookie yok.
+        """
+        if time.time() < self.blocked_until:
+            return UNAVAILABLE, None
+        if not self.reload_cookies_if_changed():
+            return UNAVAILABLE, None
+
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logging.warning(f"HTTP fetch failed for {url}: {e}")
+            return ERROR, None
+
+        # Beklenen içerik varsa sayfa geçerli; block işaretlerine bakılmaz
+        if response.ok and ready_marker in response.text:
+            if self.on_success:
+                self.on_success()
+            return OK, response.text
+
+        reason = self.block_reason(response)
+        if reason:
+            logging.info(f"HTTP fetch got a {reason} page (status {response.status_code}), falling back to browser")
+            self.blocked_until = time.time() + self.cooldown_seconds
+            if reason == 'blocked' and self.on_block:
+                self.on_block()
+            return BLOCKED, None
+
+        if response.ok or response.status_code in (404, 410):
+            logging.info(f"HTTP response for {url} (status {response.status_code}) has no '{ready_marker}'")
+            return EMPTY, None
+
+        logging.warning(f"HTTP fetch for {url} returned status {response.status_code}")
+        return ERROR, None
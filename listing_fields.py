@@ -0,0 +1,51 @@
+"""
+Arama satırındaki metin alanlarından tipli değerler (fiyat, km, yıl, il/ilçe)
+"""
+import re
+
+# Ekranda gösterilen metinlerin yanında saklanan tipli alanlar
+TYPED_FIELDS = ('price_tl', 'km_value', 'year_value', 'city', 'district')
+
+
+def parse_int(text):
+    """'1.039.850 TL' -> 1039850, None if there are no digits"""
+    digits = re.sub(r'\D', '', str(text or ''))
+    return int(digits) if digits else None
+
+
+def parse_price_tl(text):
+    """TL price as int; None for other currencies or missing prices"""
+    text = str(text or '').strip()
+    if not text or re.search(r'(USD|EUR|GBP|\$|€|£)', text, re.IGNORECASE):
+        return None
+    return parse_int(text)
+
+
+def parse_year(text):
+    year = parse_int(text)
+    return year if year and 1900 < year < 2100 else None
+
+
+def normalize_listing(listing, location_parts=None):
+    """
+    Add typed fields next to the display strings. location_parts are the
+    text nodes of the location cell (['İstanbul', 'Pendik']); without them
+    existing city/district values are kept.
+    """
+    listing['price_tl'] = parse_price_tl(listing.get('price'))
+    listing['km_value'] = parse_int(listing.get('km'))
+    listing['year_value'] = parse_year(listing.get('year'))
+    if location_parts is not None:
+        listing['city'] = location_parts[0] if len(location_parts) > 0 else None
+        listing['district'] = location_parts[1] if len(location_parts) > 1 else None
+    else:
+        listing.setdefault('city', None)
+        listing.setdefault('district', None)
+    return listing
+
+
+def format_location(listing):
+    """'İstanbul / Pendik' if the location was split, otherwise the raw text"""
+    if listing.get('city'):
+        return ' / '.join(part for part in (listing.get('city'), listing.get('district')) if part)
+    return listing.get('location', 'N/A')
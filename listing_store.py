@@ -0,0 +1,320 @@
+"""
+Parse edilen tüm ilanların geçmişi (SQLite) - kabul edilen ve reddedilenler
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from listing_fields import TYPED_FIELDS, normalize_listing, parse_int, parse_price_tl, parse_year
+
+
+class ListingStore:
+    """
+    Her ilan tek satır: arama satırı alanları, hasar bilgisi, karar ve zaman
+    damgaları. Dashboard sayfalı sorgularla okur.
+    """
+
+    LISTING_FIELDS = ('title', 'url', 'year', 'km', 'color', 'price', 'location', 'brand')
+    TYPED_COLUMNS = {
+        'price_tl': 'INTEGER',
+        'km_value': 'INTEGER',
+        'year_value': 'INTEGER',
+        'city': 'TEXT',
+        'district': 'TEXT'
+    }
+    # ?sort= değerleri -> sütun (başında '-' varsa azalan)
+    SORT_COLUMNS = {
+        'price': 'price_tl',
+        'km': 'km_value',
+        'year': 'year_value',
+        'found_at': 'checked_at'
+    }
+    # Aralık filtreleri -> (sütun, operatör)
+    RANGE_FILTERS = {
+        'min_price': ('price_tl', '>='),
+        'max_price': ('price_tl', '<='),
+        'min_km': ('km_value', '>='),
+        'max_km': ('km_value', '<='),
+        'min_year': ('year_value', '>='),
+        'max_year': ('year_value', '<=')
+    }
+
+    def __init__(self, db_path, legacy_json_file=None):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS listings (
+                id TEXT PRIMARY KEY,
+                brand TEXT,
+                title TEXT,
+                url TEXT,
+                year TEXT,
+                km TEXT,
+                color TEXT,
+                price TEXT,
+                location TEXT,
+                damage_info TEXT,
+                accepted INTEGER NOT NULL DEFAULT 0,
+                reject_reason TEXT,
+                first_seen REAL NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_listings_accepted_checked ON listings (accepted, checked_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_listings_brand ON listings (brand)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_listings_checked ON listings (checked_at)')
+        self._add_typed_columns()
+        self._add_detail_cache_columns()
+        # Dashboard ETag/Last-Modified için veri sürümü, her yazmada artar
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS listings_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL,
+                updated_at REAL
+            )
+        ''')
+        self.conn.execute(
+            'INSERT OR IGNORE INTO listings_version (id, version, updated_at) '
+            'SELECT 1, 0, MAX(checked_at) FROM listings'
+        )
+        self.conn.commit()
+
+        if legacy_json_file:
+            self._import_legacy_json(legacy_json_file)
+
+    def _add_typed_columns(self):
+        """Eski veritabanlarına tipli sütunları ekler, sayıları metin alanlardan doldurur"""
+        existing = {row['name'] for row in self.conn.execute('PRAGMA table_info(listings)')}
+        missing = [column for column in TYPED_FIELDS if column not in existing]
+        for column in missing:
+            self.conn.execute(f'ALTER TABLE listings ADD COLUMN {column} {self.TYPED_COLUMNS[column]}')
+
+        if missing:
+            # İl/ilçe eski kayıtlarda birleşik metin ("İstanbulPendik"), ayrılamıyor - NULL kalır
+            rows = self.conn.execute('SELECT id, price, km, year FROM listings').fetchall()
+            self.conn.executemany(
+                'UPDATE listings SET price_tl = ?, km_value = ?, year_value = ? WHERE id = ?',
+                [(parse_price_tl(row['price']), parse_int(row['km']), parse_year(row['year']), row['id'])
+                 for row in rows]
+            )
+            if rows:
+                logging.info(f"Backfilled typed fields for {len(rows)} stored listings")
+
+        for column in ('price_tl', 'km_value', 'year_value', 'city'):
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_listings_{column} ON listings ({column})')
+
+    def _add_detail_cache_columns(self):
+        """
+        detail_fetched_at: son gerçek detay sayfası çekimi (cache TTL buna göre),
+        detail_accessed_at: cache'ten son okunma (LRU). Sadece bu ikisi doluysa
+        satırın hasar bilgisi cache olarak kullanılır.
+        """
+        existing = {row['name'] for row in self.conn.execute('PRAGMA table_info(listings)')}
+        for column in ('detail_fetched_at', 'detail_accessed_at'):
+            if column not in existing:
+                self.conn.execute(f'ALTER TABLE listings ADD COLUMN {column} REAL')
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_listings_detail_accessed ON listings (detail_accessed_at) '
+            'WHERE detail_fetched_at IS NOT NULL'
+        )
+
+    def drop_legacy_detail_cache(self):
+        """Eski ayrı detail_cache tablosunu siler (hasar bilgisi bu tabloda), sadece scraper çağırır"""
+        with self._lock:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'detail_cache'"
+            ).fetchone()
+            if exists:
+                with self.conn:
+                    self.conn.execute('DROP TABLE detail_cache')
+                logging.info("Dropped legacy detail_cache table")
+
+    def _import_legacy_json(self, legacy_json_file):
+        if not os.path.exists(legacy_json_file):
+            return
+        try:
+            with open(legacy_json_file, 'r', encoding='utf-8') as f:
+                listings = json.load(f)
+            found_at = os.path.getmtime(legacy_json_file)
+            for listing in listings:
+                self.record(listing, True, None, checked_at=found_at)
+            os.replace(legacy_json_file, legacy_json_file + '.migrated')
+            logging.info(f"Imported {len(listings)} listings from {legacy_json_file}")
+        except Exception as e:
+            logging.warning(f"Could not import {legacy_json_file}: {e}")
+
+    def record(self, listing, accepted, reason, checked_at=None, detail_fetched=False):
+        """
+        Insert or update a parsed listing with its filter decision.
+        detail_fetched=True only right after a real detail page fetch; it
+        (re)starts the row's detail cache lifetime.
+        """
+        checked_at = checked_at or time.time()
+        detail_fetched_at = checked_at if detail_fetched else None
+        if 'price_tl' not in listing:
+            listing = normalize_listing(dict(listing))
+        fields = self.LISTING_FIELDS + TYPED_FIELDS
+        values = [listing.get(field) for field in fields]
+        damage_info = listing.get('damage_info')
+        if damage_info is not None:
+            damage_info = json.dumps(damage_info, ensure_ascii=False)
+        with self._lock, self.conn:
+            self.conn.execute(f'''
+                INSERT INTO listings (id, {', '.join(fields)}, damage_info, accepted, reject_reason, first_seen, checked_at,
+                                      detail_fetched_at, detail_accessed_at)
+                VALUES (?, {', '.join('?' * len(fields))}, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    {', '.join(f'{field} = excluded.{field}' for field in fields)},
+                    damage_info = COALESCE(excluded.damage_info, listings.damage_info),
+                    accepted = excluded.accepted,
+                    reject_reason = excluded.reject_reason,
+                    checked_at = excluded.checked_at,
+                    detail_fetched_at = COALESCE(excluded.detail_fetched_at, listings.detail_fetched_at),
+                    detail_accessed_at = COALESCE(excluded.detail_accessed_at, listings.detail_accessed_at)
+            ''', [listing['id'], *values, damage_info, int(accepted), reason, checked_at, checked_at,
+                  detail_fetched_at, detail_fetched_at])
+            self._bump_version()
+
+    def set_decisions(self, decisions):
+        """Bulk update (listing_id, accepted, reason) tuples, e.g. after a refilter"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'UPDATE listings SET accepted = ?, reject_reason = ? WHERE id = ?',
+                [(int(accepted), reason, listing_id) for listing_id, accepted, reason in decisions]
+            )
+            self._bump_version()
+
+    def decisions(self, listing_ids):
+        """{listing_id: (accepted, reject_reason)} for the stored ones among listing_ids"""
+        listing_ids = list(listing_ids)
+        if not listing_ids:
+            return {}
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, accepted, reject_reason FROM listings WHERE id IN ({', '.join('?' * len(listing_ids))})",
+                listing_ids
+            ).fetchall()
+        return {row['id']: (bool(row['accepted']), row['reject_reason']) for row in rows}
+
+    def stored_damage_info(self, listing_id, max_age_seconds):
+        """(damage_info, detail_fetched_at) if the detail page was fetched within max_age_seconds, else None"""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT damage_info, detail_fetched_at FROM listings '
+                'WHERE id = ? AND damage_info IS NOT NULL AND detail_fetched_at >= ?',
+                (listing_id, now - max_age_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute('UPDATE listings SET detail_accessed_at = ? WHERE id = ?', (now, listing_id))
+        return json.loads(row['damage_info']), row['detail_fetched_at']
+
+    def trim_detail_cache(self, max_age_seconds, max_entries):
+        """
+        Stop serving expired rows and all but the max_entries most recently used
+        ones from the detail cache. The listing history itself is kept.
+        Returns how many rows left the cache.
+        """
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.execute(
+                'UPDATE listings SET detail_fetched_at = NULL, detail_accessed_at = NULL WHERE detail_fetched_at < ?',
+                (time.time() - max_age_seconds,)
+            )
+            self.conn.execute(
+                'UPDATE listings SET detail_fetched_at = NULL, detail_accessed_at = NULL WHERE id IN ('
+                '  SELECT id FROM listings WHERE detail_fetched_at IS NOT NULL'
+                '  ORDER BY detail_accessed_at DESC LIMIT -1 OFFSET ?'
+                ')',
+                (max_entries,)
+            )
+            return self.conn.total_changes - before
+
+    def _bump_version(self):
+        self.conn.execute(
+            'UPDATE listings_version SET version = version + 1, updated_at = ? WHERE id = 1', (time.time(),)
+        )
+
+    def version(self):
+        """(version, updated_at) - changes on every write, from any process"""
+        with self._lock:
+            row = self.conn.execute('SELECT version, updated_at FROM listings_version WHERE id = 1').fetchone()
+        return (row['version'], row['updated_at']) if row else (0, None)
+
+    def _where(self, accepted, brand, filters=None):
+        clauses, params = [], []
+        if accepted is not None:
+            clauses.append('accepted = ?')
+            params.append(int(accepted))
+        if brand:
+            clauses.append('brand = ?')
+            params.append(brand)
+        for key, value in (filters or {}).items():
+            if key == 'city':
+                clauses.append('city = ?')
+                params.append(value)
+            elif key in self.RANGE_FILTERS:
+                column, operator = self.RANGE_FILTERS[key]
+                clauses.append(f'{column} {operator} ?')
+                params.append(value)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _order_by(self, sort):
+        """'price' / '-price' ... -> ORDER BY clause, rows without a value go last"""
+        sort = sort or '-found_at'
+        descending = sort.startswith('-')
+        column = self.SORT_COLUMNS.get(sort.lstrip('-').replace('-', '_'), 'checked_at')
+        return f"{column} IS NULL, {column} {'DESC' if descending else 'ASC'}, checked_at DESC, id"
+
+    def query(self, accepted=True, brand=None, limit=50, offset=0, sort=None, filters=None):
+        """Newest first unless sort is given; accepted=None returns accepted and rejected listings"""
+        where, params = self._where(accepted, brand, filters)
+        with self._lock:
+            rows = self.conn.execute(
+                f'SELECT * FROM listings{where} ORDER BY {self._order_by(sort)} LIMIT ? OFFSET ?',
+                params + [limit, offset]
+            ).fetchall()
+        return [self._row_to_listing(row) for row in rows]
+
+    def count(self, accepted=True, brand=None, filters=None):
+        where, params = self._where(accepted, brand, filters)
+        with self._lock:
+            return self.conn.execute(f'SELECT COUNT(*) FROM listings{where}', params).fetchone()[0]
+
+    def checked_since(self, since, limit=200):
+        """
+        Listings written after the (checked_at, id) cursor `since`, oldest first.
+        Returns (listings, new cursor); fewer than `limit` listings means caught up.
+        """
+        checked_at, listing_id = since
+        with self._lock:
+            # id eşitliği bozar: aynı checked_at'e sahip satırlar sayfa sınırında atlanmaz
+            rows = self.conn.execute(
+                'SELECT * FROM listings WHERE checked_at >= ? AND (checked_at > ? OR id > ?) '
+                'ORDER BY checked_at, id LIMIT ?', (checked_at, checked_at, listing_id, limit)
+            ).fetchall()
+        cursor = (rows[-1]['checked_at'], rows[-1]['id']) if rows else since
+        return [self._row_to_listing(row) for row in rows], cursor
+
+    def all_parsed(self):
+        """Every listing that has damage info, for re-filtering"""
+        with self._lock:
+            rows = self.conn.execute('SELECT * FROM listings WHERE damage_info IS NOT NULL').fetchall()
+        return [self._row_to_listing(row) for row in rows]
+
+    def _row_to_listing(self, row):
+        listing = {field: row[field] for field in ('id',) + self.LISTING_FIELDS + TYPED_FIELDS}
+        listing['damage_info'] = json.loads(row['damage_info']) if row['damage_info'] else None
+        listing['accepted'] = bool(row['accepted'])
+        listing['reject_reason'] = row['reject_reason']
+        listing['first_seen'] = datetime.fromtimestamp(row['first_seen']).isoformat()
+        listing['found_at'] = datetime.fromtimestamp(row['checked_at']).isoformat()
+        return listing
@@ -0,0 +1,131 @@
+"""
+Dashboard için tek canlı izleyici: log dosyası, scraper durumu ve ilan
+kararlarındaki değişiklikleri SocketIO odalarına iter
+"""
+import logging
+import threading
+import time
+
+from log_tail import log_id, read_since, tail
+
+ROOMS = ('logs', 'status', 'listings')
+
+
+class LiveWatcher:
+    """
+    En az bir abone varken kaynakları poll_seconds'ta bir kontrol eder
+    (log için stat, durum için mtime cache'li okuma, ilanlar için veritabanı
+    sürümü) ve sadece değişen kısmı ilgili odaya yayınlar. Abone sayısından
+    bağımsız tek thread çalışır; son abone ayrılınca thread durur.
+    """
+
+    LISTINGS_PAGE = 200
+
+    def __init__(self, socketio, log_file, status_loader, listing_store, poll_seconds=0.5):
+        self.socketio = socketio
+        self.log_file = log_file
+        self.status_loader = status_loader
+        self.listing_store = listing_store
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._running = False
+
+    def subscribe(self, sid, rooms):
+        with self._lock:
+            self._subscribers[sid] = set(rooms)
+            start = not self._running
+            self._running = True
+        if start:
+            self._reset_cursors()
+            self.socketio.start_background_task(self._loop)
+
+    def unsubscribe(self, sid):
+        with self._lock:
+            self._subscribers.pop(sid, None)
+
+    def _reset_cursors(self):
+        # Yeni aboneler sayfayla birlikte mevcut durumu aldı, izleyici şu andan itibaren yayınlar
+        self.log_id = log_id(self.log_file)
+        self.log_offset = tail(self.log_file, 0)[1]
+        self.status = self.status_loader()
+        self.listings_version = self.listing_store.version()
+        self.listings_cursor = (time.time(), '')
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._running = False
+                    return
+                rooms = set().union(*self._subscribers.values())
+
+            try:
+                if 'logs' in rooms:
+                    self._check_logs()
+                if 'status' in rooms:
+                    self._check_status()
+                if 'listings' in rooms:
+                    self._check_listings()
+            except Exception as e:
+                logging.error(f"Live feed error: {e}")
+
+            self.socketio.sleep(self.poll_seconds)
+
+    def _check_logs(self):
+        previous_offset = self.log_offset
+        current = log_id(self.log_file)
+        if current != self.log_id:
+            # Dosya döndürüldü
+            lines, self.log_offset = tail(self.log_file, 50)
+            reset = True
+        else:
+            lines, self.log_offset, reset = read_since(self.log_file, previous_offset, 200)
+        self.log_id = current
+
+        if lines or reset:
+            self.socketio.emit('logs_update', {
+                'logs': lines,
+                'from': None if reset else previous_offset,
+                'offset': self.log_offset,
+                'log_id': current,
+                'reset': reset
+            }, to='logs')
+
+    def _check_status(self):
+        status = self.status_loader()
+        changes = {key: value for key, value in status.items() if self.status.get(key) != value}
+        self.status = status
+        if changes:
+            self.socketio.emit('status_update', changes, to='status')
+
+    def _check_listings(self):
+        version = self.listing_store.version()
+        if version == self.listings_version:
+            return
+        self.listings_version = version
+
+        # Tek yoklamada 200'den fazla satır yazılmış olabilir (ör. çok sayfalı ön filtre), hepsi okunur
+        listings = []
+        while True:
+            page, self.listings_cursor = self.listing_store.checked_since(self.listings_cursor, self.LISTINGS_PAGE)
+            listings += page
+            if len(page) < self.LISTINGS_PAGE:
+                break
+        self.socketio.emit('listings_update', {
+            'events': [
+                {
+                    'id': listing['id'],
+                    'brand': listing['brand'],
+                    'title': listing['title'],
+                    'url': listing['url'],
+                    'price': listing['price'],
+                    'accepted': listing['accepted'],
+                    'reject_reason': listing['reject_reason'],
+                    'found_at': listing['found_at']
+                }
+                for listing in listings
+            ],
+            # Yeniden filtreleme sadece sayıyı değiştirir
+            'total_accepted': self.listing_store.count(accepted=True)
+        }, to='listings')
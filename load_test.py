@@ -0,0 +1,172 @@
+"""
+run_single_check'i mock_server.py'ye karşı uçtan uca ölçen yük testi.
+
+    python load_test.py --workers 1 2 4 8 --brands 3 --listings-per-brand 60 --latency 50 150
+
+Her worker sayısı için boş bir veri dizininde tam bir tarama turu çalışır
+(arama sayfaları + tüm detay sayfaları, sadece HTTP). Tur süresi, ilan/sn ve
+sunucunun gördüğü istek/hata sayıları raporlanır. Chrome açılmaz;
+HTTP ile alınamayan sayfalar atlanır.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+from mock_server import MockSettings, create_app
+
+
+def start_mock_server(settings, port, seed):
+    app = create_app(settings, seed=seed)
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='mock-server', daemon=True)
+    thread.start()
+    return server, app
+
+
+def write_scraper_config(data_dir, base_url, args, workers):
+    config = {
+        'check_interval_minutes': 30,
+        'max_replaced_parts': 1,
+        'max_painted_parts': 2,
+        'detail_workers': workers,
+        'http_first': True,
+        'browser_fallback': False,
+        'http_block_cooldown_seconds': args.block_cooldown,
+        'base_url': base_url,
+        'max_pages': args.max_pages,
+        'pacing': {'page_load': [0, 0], 'between_listings': [0, 0]},
+        'prefilter': {'max_price': args.max_price, 'max_km': args.max_km},
+        'rate_limit': {
+            'rate_per_minute': args.rate_per_minute,
+            'max_rate': args.rate_per_minute,
+            'burst': workers * 2
+        },
+        'brands': [
+            {
+                'name': f'Mock Brand {i}',
+                'url': f'{base_url}/mock-brand-{i}?pagingSize=20&sorting=date_desc',
+                'enabled': True
+            }
+            for i in range(1, args.brands + 1)
+        ]
+    }
+    config_file = os.path.join(data_dir, 'config.json')
+    with open(config_file, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    # HttpFetcher cookie dosyası olmadan istek atmıyor
+    with open(os.path.join(data_dir, 'sahibinden_cookies.json'), 'w', encoding='utf-8') as f:
+        json.dump([{'name': 'mock_session', 'value': '1', 'domain': '127.0.0.1', 'path': '/'}], f)
+    return config_file
+
+
+def run_cycle(args, base_url, workers, client):
+    from sahibinden_scraper import SahibindenScraper
+
+    client.post('/__reset')
+    with tempfile.TemporaryDirectory(prefix='sahibinden-load-') as data_dir:
+        cwd = os.getcwd()
+        os.chdir(data_dir)
+        try:
+            scraper = SahibindenScraper(write_scraper_config(data_dir, base_url, args, workers))
+            # Yük testinde gerçek e-posta gitmesin
+            scraper.email_sender.user = ''
+
+            start = time.perf_counter()
+            try:
+                scraper.run_single_check()
+            finally:
+                elapsed = time.perf_counter() - start
+                if scraper.worker_pool:
+                    scraper.worker_pool.shutdown()
+
+            processed = scraper.listing_store.count(accepted=None)
+            accepted = scraper.listing_store.count(accepted=True)
+            with open(scraper.status_file, 'r', encoding='utf-8') as f:
+                last_cycle = json.load(f).get('last_cycle', {})
+        finally:
+            os.chdir(cwd)
+
+    stats = client.get('/__stats').get_json()
+    return {
+        'workers': workers,
+        'seconds': round(elapsed, 2),
+        'processed': processed,
+        'accepted': accepted,
+        'listings_per_sec': round(processed / elapsed, 1) if elapsed else 0,
+        'server': stats,
+        'prefiltered': last_cycle.get('counters', {}).get('detail_fetches_saved', 0),
+        'stages': last_cycle.get('stages', {})
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end scrape cycle load test against mock_server.py')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='detail_workers values to compare')
+    parser.add_argument('--brands', type=int, default=2)
+    parser.add_argument('--listings-per-brand', type=int, default=40)
+    parser.add_argument('--max-pages', type=int, default=2)
+    parser.add_argument('--latency', type=int, nargs=2, default=[20, 80], metavar=('MIN_MS', 'MAX_MS'))
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--block-rate', type=float, default=0.0)
+    parser.add_argument('--challenge-rate', type=float, default=0.0)
+    parser.add_argument('--login-rate', type=float, default=0.0)
+    parser.add_argument('--block-cooldown', type=int, default=0,
+                        help='http_block_cooldown_seconds used by the scraper during the test')
+    parser.add_argument('--rate-per-minute', type=int, default=6000, help='rate controller ceiling during the test')
+    parser.add_argument('--max-price', type=int, default=None, help='prefilter.max_price for the scraper')
+    parser.add_argument('--max-km', type=int, default=None, help='prefilter.max_km for the scraper')
+    parser.add_argument('--port', type=int, default=8009)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true', help='keep the scraper INFO logs')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    if os.path.exists('/app/data'):
+        print("Uyarı: /app/data mevcut, scraper verileri geçici dizin yerine oraya yazacak")
+
+    settings = MockSettings(
+        latency_min_ms=args.latency[0],
+        latency_max_ms=args.latency[1],
+        error_rate=args.error_rate,
+        block_rate=args.block_rate,
+        challenge_rate=args.challenge_rate,
+        login_rate=args.login_rate,
+        listings_per_brand=args.listings_per_brand
+    )
+    server, app = start_mock_server(settings, args.port, args.seed)
+    base_url = f'http://127.0.0.1:{args.port}'
+    client = app.test_client()
+
+    # sahibinden_scraper import edilince logging yapılandırılıyor
+    import sahibinden_scraper  # noqa: F401
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    results = []
+    try:
+        for workers in args.workers:
+            result = run_cycle(args, base_url, workers, client)
+            results.append(result)
+            if not args.json:
+                server_stats = result['server']
+                failures = {key: value for key, value in server_stats.items() if key not in ('requests', 'search', 'detail')}
+                print(f"workers={workers:<3} {result['seconds']:>7.2f}s | {result['processed']:>4} listings "
+                      f"({result['accepted']} accepted, {result['prefiltered']} pre-filtered) | {result['listings_per_sec']:>6.1f} listings/s | "
+                      f"requests={server_stats.get('requests', 0)} failures={failures or 0}")
+    finally:
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
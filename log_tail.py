@@ -0,0 +1,88 @@
+"""
+Log dosyasını baştan okumadan son satırları / yeni eklenen satırları okur
+"""
+import os
+
+BLOCK_SIZE = 8192
+
+
+def log_id(path):
+    """Identifies the current log file; changes when the scraper rotates it"""
+    try:
+        return os.stat(path).st_ino
+    except OSError:
+        return None
+
+
+def _split(data):
+    """Raw byte lines ending with b'\\n' - offsets are counted on these"""
+    return data.splitlines(keepends=True)
+
+
+def _decode(raw_lines):
+    return [line.decode('utf-8', errors='replace') for line in raw_lines]
+
+
+def tail(path, limit=100):
+    """
+    Last `limit` complete lines, read backwards block by block from the end.
+    Returns (lines, offset) - offset points right after the last newline, so
+    a half-written last line is picked up by the next read_since call.
+    """
+    if limit <= 0:
+        return [], tail(path, 1)[1]
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return [], 0
+
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position, data = end, b''
+        # limit+1 newline: baştaki yarım satır atılabilsin
+        while position > 0 and data.count(b'\n') <= limit:
+            step = min(BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+
+    last_newline = data.rfind(b'\n')
+    if last_newline < 0:
+        return [], position
+    offset = position + last_newline + 1
+    lines = _split(data[:last_newline + 1])
+    if position > 0:
+        # İlk satır bloğun ortasından başlıyor olabilir
+        lines = lines[1:]
+    return _decode(lines[-limit:]), offset
+
+
+def read_since(path, offset, limit=1000, max_bytes=1024 * 1024):
+    """
+    Complete lines appended after byte `offset`. Returns (lines, offset, reset);
+    reset is True when the file is shorter than offset (rotated/truncated) and
+    the lines are a fresh tail instead of a continuation. At most `limit` lines
+    and max_bytes are read per call; the returned offset points right after the
+    last returned line, so the rest comes with the next call.
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return [], 0, offset > 0
+
+    if offset < 0 or offset > size:
+        lines, new_offset = tail(path, limit)
+        return lines, new_offset, True
+    if offset == size:
+        return [], offset, False
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(min(max_bytes, size - offset))
+
+    last_newline = data.rfind(b'\n')
+    if last_newline < 0:
+        return [], offset, False
+    # İlk `limit` satır; fazlası atlanmaz, sonraki çağrı offset'ten devam eder
+    lines = _split(data[:last_newline + 1])[:max(limit, 0)]
+    return _decode(lines), offset + sum(len(line) for line in lines), False
@@ -0,0 +1,194 @@
+"""
+Tarama aşamalarının süre ölçümü: Prometheus tarzı histogram/counter'lar ve tur özeti
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# Saniye cinsinden histogram sınırları (sayfa beklemeleri dakikalara çıkabiliyor)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+
+METRIC_PREFIX = 'sahibinden'
+
+
+class StageMetrics:
+    """
+    Thread-safe stage timers. Observations are aggregated per (stage, brand)
+    for export; the listing tag only feeds the per-cycle slowest-listing list
+    so the exported label set stays small.
+    """
+
+    def __init__(self, snapshot_file=None, buckets=DEFAULT_BUCKETS):
+        self.snapshot_file = snapshot_file
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.histograms = {}
+        self.counters = {}
+        self.cycle = None
+
+    @contextmanager
+    def context(self, **labels):
+        """Tag every timer started in this thread (e.g. brand, listing)"""
+        previous = getattr(self._local, 'labels', {})
+        self._local.labels = {**previous, **labels}
+        try:
+            yield
+        finally:
+            self._local.labels = previous
+
+    def _labels(self, labels):
+        return {**getattr(self._local, 'labels', {}), **labels}
+
+    def current_labels(self):
+        """Labels set by context() in this thread"""
+        return dict(getattr(self._local, 'labels', {}))
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def observe(self, stage, seconds, **labels):
+        labels = self._labels(labels)
+        listing_id = labels.pop('listing', None)
+        key = (stage, tuple(sorted(labels.items())))
+
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+            if self.cycle is not None:
+                stage_total = self.cycle['stages'].setdefault(stage, {'count': 0, 'seconds': 0.0, 'max': 0.0})
+                stage_total['count'] += 1
+                stage_total['seconds'] += seconds
+                stage_total['max'] = max(stage_total['max'], seconds)
+                if listing_id:
+                    self.cycle['listings'][listing_id] = self.cycle['listings'].get(listing_id, 0.0) + seconds
+
+    def inc(self, name, amount=1, **labels):
+        labels = self._labels(labels)
+        labels.pop('listing', None)
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+            if self.cycle is not None:
+                self.cycle['counters'][name] = self.cycle['counters'].get(name, 0) + amount
+
+    def start_cycle(self):
+        with self._lock:
+            self.cycle = {'started_at': time.time(), 'stages': {}, 'listings': {}, 'counters': {}}
+
+    def finish_cycle(self, slowest=5):
+        """Close the current cycle and return its summary for the status file"""
+        with self._lock:
+            cycle, self.cycle = self.cycle, None
+        if cycle is None:
+            return None
+
+        duration = time.time() - cycle['started_at']
+        self.observe('cycle', duration)
+        slowest_listings = sorted(cycle['listings'].items(), key=lambda item: item[1], reverse=True)[:slowest]
+        return {
+            'started_at': cycle['started_at'],
+            'duration_seconds': round(duration, 2),
+            'stages': {
+                stage: {
+                    'count': total['count'],
+                    'seconds': round(total['seconds'], 3),
+                    'max_seconds': round(total['max'], 3)
+                }
+                for stage, total in sorted(cycle['stages'].items(), key=lambda item: item[1]['seconds'], reverse=True)
+            },
+            'counters': cycle['counters'],
+            'slowest_listings': [{'id': listing_id, 'seconds': round(seconds, 2)} for listing_id, seconds in slowest_listings]
+        }
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'updated_at': time.time(),
+                'buckets': list(self.buckets),
+                'histograms': [
+                    {'stage': stage, 'labels': dict(labels), 'buckets': list(h['buckets']), 'sum': h['sum'], 'count': h['count']}
+                    for (stage, labels), h in self.histograms.items()
+                ],
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in self.counters.items()
+                ]
+            }
+
+    def save(self):
+        """Write the snapshot the dashboard's /metrics route reads"""
+        if not self.snapshot_file:
+            return
+        try:
+            with open(self.snapshot_file, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False)
+        except Exception as e:
+            logging.debug(f"Could not save metrics snapshot: {e}")
+
+
+def timed(stage, **labels):
+    """Method decorator timing the call with self.metrics"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.timer(stage, **labels):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def render_prometheus(snapshot):
+    """Prometheus text exposition format of a StageMetrics snapshot"""
+    lines = []
+    name = f'{METRIC_PREFIX}_stage_duration_seconds'
+    lines.append(f'# HELP {name} Time spent in each scrape stage')
+    lines.append(f'# TYPE {name} histogram')
+    bounds = snapshot.get('buckets', [])
+    for histogram in snapshot.get('histograms', []):
+        labels = {'stage': histogram['stage'], **histogram['labels']}
+        for bound, count in zip(bounds, histogram['buckets']):
+            lines.append(f'{name}_bucket{_format_labels({**labels, "le": bound})} {count}')
+        lines.append(f'{name}_bucket{_format_labels({**labels, "le": "+Inf"})} {histogram["count"]}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {histogram["sum"]:.6f}')
+        lines.append(f'{name}_count{_format_labels(labels)} {histogram["count"]}')
+
+    counters = {}
+    for counter in snapshot.get('counters', []):
+        counters.setdefault(counter['name'], []).append(counter)
+    for counter_name, series in sorted(counters.items()):
+        name = f'{METRIC_PREFIX}_{counter_name}_total'
+        lines.append(f'# TYPE {name} counter')
+        for counter in series:
+            lines.append(f'{name}{_format_labels(counter["labels"])} {counter["value"]}')
+
+    if snapshot.get('updated_at'):
+        name = f'{METRIC_PREFIX}_metrics_updated_timestamp_seconds'
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {snapshot["updated_at"]:.0f}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,310 @@
+"""
+Uçtan uca test ve yük testi için yerel sahte Sahibinden sunucusu.
+
+    python mock_server.py --port 8008 --latency 50 200 --block-rate 0.05
+
+Arama ve detay sayfaları gerçek sitenin HTML yapısıyla, ilan ID'sinden
+deterministik olarak üretilir. Her istekte verilen oranlarda rate limit
+(olagan-disi-kullanim), Cloudflare (btn-continue), login yönlendirmesi, OTP
+formu veya 500 hatası döner. Oranlar çalışırken POST /__config ile
+değiştirilebilir, istek sayıları GET /__stats ile okunur.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from html import escape
+from urllib.parse import quote
+
+from flask import Flask, jsonify, redirect, request
+
+COLORS = ['Beyaz', 'Siyah', 'Gri (Gümüş)', 'Mavi', 'Kırmızı', 'Lacivert']
+CITIES = [('İstanbul', 'Pendik'), ('Ankara', 'Çankaya'), ('İzmir', 'Karşıyaka'), ('Bursa', 'Nilüfer'), ('Antalya', 'Muratpaşa')]
+PARTS = ['Sol Ön Çamurluk', 'Sağ Ön Çamurluk', 'Sol Ön Kapı', 'Sağ Ön Kapı', 'Sol Arka Kapı',
+         'Sağ Arka Kapı', 'Sol Arka Çamurluk', 'Sağ Arka Çamurluk', 'Bagaj Kapağı', 'Tavan', 'Motor Kaputu']
+
+# Hata enjeksiyonu yapılmayan yollar
+INTERNAL_PREFIXES = ('/__', '/login', '/olagan-disi-kullanim', '/favicon.ico')
+
+
+class MockSettings:
+    """Runtime-tunable latency and failure rates"""
+
+    FIELDS = ('latency_min_ms', 'latency_max_ms', 'error_rate', 'block_rate', 'challenge_rate',
+              'login_rate', 'otp_rate', 'listings_per_brand', 'new_listings_per_minute')
+
+    def __init__(self, latency_min_ms=0, latency_max_ms=0, error_rate=0.0, block_rate=0.0, challenge_rate=0.0,
+                 login_rate=0.0, otp_rate=0.0, listings_per_brand=60, new_listings_per_minute=0):
+        self.latency_min_ms = latency_min_ms
+        self.latency_max_ms = max(latency_min_ms, latency_max_ms)
+        self.error_rate = error_rate
+        self.block_rate = block_rate
+        self.challenge_rate = challenge_rate
+        self.login_rate = login_rate
+        self.otp_rate = otp_rate
+        self.listings_per_brand = listings_per_brand
+        # >0 ise date_desc aramalarda zamanla yeni ilanlar en üste eklenir
+        self.new_listings_per_minute = new_listings_per_minute
+        self.started_at = time.time()
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def update(self, values):
+        for field in self.FIELDS:
+            if field in values:
+                setattr(self, field, type(getattr(self, field))(values[field]))
+
+
+def brand_seed(brand_slug):
+    return sum(ord(ch) * (i + 1) for i, ch in enumerate(brand_slug)) % 9000
+
+
+def listing_id(brand_slug, index):
+    """Listing ids grow with index, so index 0 is the oldest listing"""
+    return str(1280000000 + brand_seed(brand_slug) * 10000 + index)
+
+
+def listing_data(brand_slug, ad_id):
+    rng = random.Random(ad_id)
+    year = rng.randint(2012, 2023)
+    city, district = rng.choice(CITIES)
+    return {
+        'id': ad_id,
+        'title': f"{brand_slug.replace('-', ' ').upper()} {year} {rng.choice(['HATASIZ', 'BAKIMLI', 'SAHİBİNDEN', 'GALERİDEN'])}",
+        'slug': f"vasita-otomobil-{brand_slug}-{year}-{ad_id}",
+        'year': year,
+        'km': f"{rng.randint(5, 250) * 1000:,}".replace(',', '.'),
+        'color': rng.choice(COLORS),
+        'price': f"{rng.randint(400, 2500) * 1000:,} TL".replace(',', '.'),
+        'city': city,
+        'district': district,
+    }
+
+
+def damage_lists(ad_id):
+    rng = random.Random(f"damage-{ad_id}")
+    parts = rng.sample(PARTS, rng.randint(0, 5))
+    replaced_count = rng.randint(0, min(2, len(parts)))
+    local_count = rng.randint(0, len(parts) - replaced_count)
+    return (
+        parts[replaced_count + local_count:],
+        parts[:replaced_count],
+        parts[replaced_count:replaced_count + local_count],
+    )
+
+
+def render_search_page(brand_slug, rows):
+    items = []
+    for i, data in enumerate(rows):
+        if i == 3:
+            items.append('<tr class="searchResultsItem nativeAd" data-id=""><td colspan="8">'
+                         '<div class="native-ad-container">Reklam</div></td></tr>')
+        title = escape(data['title'])
+        items.append(f'''<tr data-id="{data['id']}" class="searchResultsItem     ">
+    <td class="searchResultsTitleValue ">
+        <a class=" classifiedTitle" title="{title}" href="/ilan/{data['slug']}/detay">
+            {title}</a>
+    </td>
+    <td class="searchResultsAttributeValue">
+        {data['year']}</td>
+    <td class="searchResultsAttributeValue">
+        {data['km']}</td>
+    <td class="searchResultsAttributeValue">
+        {data['color']}</td>
+    <td class="searchResultsPriceValue">
+        <div class=" classified-price-container"><span class="">{data['price']}</span></div>
+    </td>
+    <td class="searchResultsLocationValue">
+        {data['city']}<br>{data['district']}</td>
+</tr>''')
+    return f'''<!DOCTYPE html>
+<html lang="tr"><head><meta charset="UTF-8"><title>{escape(brand_slug)} - sahibinden.com (mock)</title></head>
+<body><table id="searchResultsTable"><tbody class="searchResultsRowClass">
+{''.join(items)}
+</tbody></table></body></html>'''
+
+
+def render_detail_page(ad_id):
+    painted, replaced, local = damage_lists(ad_id)
+
+    def damage_ul(css_class, title, parts):
+        items = ''.join(f'<li class="selected-damage">{escape(part)}</li>' for part in parts)
+        return f'<ul><li class="pair-title {css_class}">{title}</li>{items}</ul>'
+
+    return f'''<!DOCTYPE html>
+<html lang="tr"><head><meta charset="UTF-8"><title>İlan {ad_id} (mock)</title></head>
+<body><div class="classifiedDetail"><div class="custom-area"><div class="car-damage-info-list">
+{damage_ul('painted-new', 'Boyalı Parçalar', painted)}
+{damage_ul('changed-new', 'Değişen Parçalar', replaced)}
+{damage_ul('local-painted-new', 'Lokal Boyalı Parçalar', local)}
+</div></div></div></body></html>'''
+
+
+RATE_LIMIT_PAGE = '''<!DOCTYPE html>
+<html lang="tr"><head><meta charset="UTF-8"><title>Olağan dışı kullanım</title></head>
+<body><div class="error-page-container too-many-requests">
+<h1>Olağan dışı bir kullanım tespit ettik.</h1></div></body></html>'''
+
+CHALLENGE_PAGE = '''<!DOCTYPE html>
+<html lang="tr"><head><meta charset="UTF-8"><title>Bir dakika lütfen...</title>
+<script src="/cdn-cgi/challenge-platform/h/b/orchestrate/jsch/v1"></script></head>
+<body><div id="challenge-stage">
+<button id="btn-continue" type="button" onclick="location.reload()">Devam Et</button>
+</div></body></html>'''
+
+LOGIN_PAGE = '''<!DOCTYPE html>
+<html lang="tr"><head><meta charset="UTF-8"><title>Giriş Yap</title></head>
+<body><form id="loginForm" method="post" action="/login">
+<input type="hidden" name="returnUrl" value="{return_url}">
+<input id="username" name="username"><input id="password" name="password" type="password">
+<button type="submit">Giriş Yap</button></form></body></html>'''
+
+OTP_PAGE = '''<!DOCTYPE html>
+<html lang="tr"><head><meta charset="UTF-8"><title>Doğrulama</title></head>
+<body><form id="twoFactorAuthenticationForm" method="post" action="/login/two-factor">
+<input type="hidden" name="returnUrl" value="{return_url}">
+<input id="code" name="code"><button type="submit">Doğrula</button></form></body></html>'''
+
+
+def create_app(settings=None, seed=None):
+    app = Flask(__name__)
+    settings = settings or MockSettings()
+    rng = random.Random(seed)
+    stats = Counter()
+    stats_lock = threading.Lock()
+
+    def count(key):
+        with stats_lock:
+            stats[key] += 1
+
+    def return_url():
+        return quote(request.full_path.rstrip('?'), safe='/?=&')
+
+    @app.before_request
+    def inject_failures():
+        if request.path.startswith(INTERNAL_PREFIXES):
+            return None
+        count('requests')
+
+        if settings.latency_max_ms:
+            time.sleep(rng.uniform(settings.latency_min_ms, settings.latency_max_ms) / 1000)
+
+        roll = rng.random()
+        for rate, outcome in (
+            (settings.error_rate, 'error'),
+            (settings.block_rate, 'block'),
+            (settings.challenge_rate, 'challenge'),
+            (settings.login_rate, 'login'),
+            (settings.otp_rate, 'otp'),
+        ):
+            if roll < rate:
+                count(outcome)
+                if outcome == 'error':
+                    return 'Internal Server Error', 500
+                if outcome == 'block':
+                    return redirect('/olagan-disi-kullanim')
+                if outcome == 'challenge':
+                    return CHALLENGE_PAGE, 403
+                if outcome == 'login':
+                    return redirect(f"/login?returnUrl={return_url()}")
+                return redirect(f"/login/two-factor?returnUrl={return_url()}")
+            roll -= rate
+        return None
+
+    @app.route('/')
+    def home():
+        return '<!DOCTYPE html><html><head><title>sahibinden.com (mock)</title></head><body></body></html>'
+
+    @app.route('/<brand_slug>')
+    def search(brand_slug):
+        paging_size = request.args.get('pagingSize', 20, type=int)
+        paging_offset = request.args.get('pagingOffset', 0, type=int)
+
+        total = settings.listings_per_brand
+        if settings.new_listings_per_minute:
+            total += int((time.time() - settings.started_at) / 60 * settings.new_listings_per_minute)
+
+        indexes = range(total)
+        if request.args.get('sorting') == 'date_desc':
+            indexes = reversed(indexes)
+        page = list(indexes)[paging_offset:paging_offset + paging_size]
+
+        count('search')
+        return render_search_page(brand_slug, [listing_data(brand_slug, listing_id(brand_slug, i)) for i in page])
+
+    @app.route('/ilan/<slug>/detay')
+    def detail(slug):
+        count('detail')
+        return render_detail_page(slug.rsplit('-', 1)[-1])
+
+    @app.route('/olagan-disi-kullanim')
+    def rate_limited():
+        return RATE_LIMIT_PAGE, 429
+
+    @app.route('/login', methods=['GET', 'POST'])
+    def login():
+        if request.method == 'POST':
+            return redirect(request.form.get('returnUrl') or '/')
+        return LOGIN_PAGE.format(return_url=escape(request.args.get('returnUrl', '/')))
+
+    @app.route('/login/two-factor', methods=['GET', 'POST'])
+    def two_factor():
+        if request.method == 'POST':
+            return redirect(request.form.get('returnUrl') or '/')
+        return OTP_PAGE.format(return_url=escape(request.args.get('returnUrl', '/')))
+
+    @app.route('/__stats')
+    def get_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    @app.route('/__config', methods=['GET', 'POST'])
+    def config():
+        if request.method == 'POST':
+            settings.update(request.get_json(force=True) or {})
+        return jsonify(settings.to_dict())
+
+    @app.route('/__reset', methods=['POST'])
+    def reset():
+        with stats_lock:
+            stats.clear()
+        return jsonify({'success': True})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock of the sahibinden.com pages used by the scraper')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8008)
+    parser.add_argument('--latency', type=int, nargs=2, default=[0, 0], metavar=('MIN_MS', 'MAX_MS'))
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--block-rate', type=float, default=0.0)
+    parser.add_argument('--challenge-rate', type=float, default=0.0)
+    parser.add_argument('--login-rate', type=float, default=0.0)
+    parser.add_argument('--otp-rate', type=float, default=0.0)
+    parser.add_argument('--listings-per-brand', type=int, default=60)
+    parser.add_argument('--new-listings-per-minute', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency_min_ms=args.latency[0],
+        latency_max_ms=args.latency[1],
+        error_rate=args.error_rate,
+        block_rate=args.block_rate,
+        challenge_rate=args.challenge_rate,
+        login_rate=args.login_rate,
+        otp_rate=args.otp_rate,
+        listings_per_brand=args.listings_per_brand,
+        new_listings_per_minute=args.new_listings_per_minute
+    )
+    app = create_app(settings, seed=args.seed)
+    print(f"Mock sahibinden listening on http://{args.host}:{args.port}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
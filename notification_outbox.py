@@ -0,0 +1,311 @@
+"""
+Kabul edilen ilanlar için kalıcı bildirim kuyruğu (SQLite), bildirim kanalları
+(e-posta, webhook) ve her kanal için arka planda çalışan gönderici
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import requests
+
+
+class NotificationOutbox:
+    """
+    Her ilan kanal başına bir kez kuyruğa girer. Gönderilemeyen kayıtlar
+    silinmez; next_attempt_at zamanı gelince tekrar denenir.
+    """
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                listing_id TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                next_attempt_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                sent_at REAL,
+                UNIQUE (listing_id, channel)
+            )
+        ''')
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_outbox_pending ON notification_outbox (sent_at, next_attempt_at)'
+        )
+        self.conn.commit()
+
+    def enqueue(self, listings, channel='email'):
+        """Queue listings for a channel, returns how many were new"""
+        now = time.time()
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO notification_outbox (listing_id, channel, payload, created_at, next_attempt_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(listing['id'], channel, json.dumps(listing, ensure_ascii=False), now, now) for listing in listings]
+            )
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def due(self, channel='email', limit=20):
+        """(row ids, listings) whose next attempt time has come, oldest first"""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT id, payload FROM notification_outbox '
+                'WHERE channel = ? AND sent_at IS NULL AND next_attempt_at <= ? '
+                'ORDER BY created_at LIMIT ?',
+                (channel, time.time(), limit)
+            ).fetchall()
+        return [row[0] for row in rows], [json.loads(row[1]) for row in rows]
+
+    def oldest_pending_at(self, channel='email'):
+        """created_at of the oldest due entry, None if nothing is due"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT MIN(created_at) FROM notification_outbox '
+                'WHERE channel = ? AND sent_at IS NULL AND next_attempt_at <= ?',
+                (channel, time.time())
+            ).fetchone()
+        return row[0]
+
+    def queued_at(self, row_ids):
+        with self._lock:
+            rows = self.conn.execute(
+                f'SELECT created_at FROM notification_outbox WHERE id IN ({",".join("?" * len(row_ids))})',
+                list(row_ids)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def mark_sent(self, row_ids):
+        with self._lock:
+            self.conn.executemany(
+                'UPDATE notification_outbox SET sent_at = ?, last_error = NULL WHERE id = ?',
+                [(time.time(), row_id) for row_id in row_ids]
+            )
+            self.conn.commit()
+
+    def mark_failed(self, row_ids, error, base_delay=60, max_delay=3600):
+        """Schedule a retry with exponential backoff per entry"""
+        now = time.time()
+        with self._lock:
+            for row_id in row_ids:
+                self.conn.execute(
+                    'UPDATE notification_outbox SET attempts = attempts + 1, last_error = ?, '
+                    'next_attempt_at = ? + MIN(?, ? * (1 << MIN(attempts, 16))) WHERE id = ?',
+                    (str(error)[:500], now, max_delay, base_delay, row_id)
+                )
+            self.conn.commit()
+
+    def stats(self, channel=None):
+        where, params = ('WHERE channel = ?', (channel,)) if channel else ('', ())
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT SUM(sent_at IS NULL), SUM(sent_at IS NULL AND attempts > 0), MAX(sent_at) '
+                f'FROM notification_outbox {where}',
+                params
+            ).fetchone()
+        return {
+            'pending': row[0] or 0,
+            'retrying': row[1] or 0,
+            'last_sent_at': row[2]
+        }
+
+
+class EmailSink:
+    """Tüm ilanları tek e-postada gönderir (EmailSender SMTP bağlantısını açık tutar)"""
+
+    kind = 'email'
+
+    def __init__(self, email_sender, name='email'):
+        self.email_sender = email_sender
+        self.name = name
+
+    def send(self, listings):
+        if self.email_sender.send_listings_email(listings):
+            return True, None
+        return False, 'send_listings_email returned False'
+
+    def close(self):
+        self.email_sender.close()
+
+
+class WebhookSink:
+    """İlanları JSON olarak bir URL'e POST eder (Slack/Discord köprüsü, ntfy, kendi servisiniz...)"""
+
+    kind = 'webhook'
+
+    def __init__(self, url, name='webhook', timeout=10, headers=None):
+        self.url = url
+        self.name = name
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+
+    def send(self, listings):
+        try:
+            response = self.session.post(
+                self.url,
+                json={'count': len(listings), 'listings': listings},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            return False, e
+        if response.ok:
+            return True, None
+        return False, f'HTTP {response.status_code}'
+
+    def close(self):
+        self.session.close()
+
+
+class NotificationSender:
+    """
+    Bir kanalın arka plan thread'i kuyruğu boşaltır. En eski bekleyen kayıt
+    batch_window_seconds kadar beklediğinde (veya max_batch dolunca) tek
+    mesajda gönderilir; hata olursa kayıtlar backoff ile tekrar denenir.
+    batch_window_seconds=0 her ilanı geldiği anda gönderir.
+    """
+
+    def __init__(self, outbox, sink, batch_window_seconds=60, max_batch=20,
+                 retry_base_seconds=60, retry_max_seconds=3600, poll_seconds=5, metrics=None):
+        self.outbox = outbox
+        self.sink = sink
+        self.channel = sink.name
+        self.metrics = metrics
+        self.batch_window_seconds = batch_window_seconds
+        self.max_batch = max_batch
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # Tur sonu özeti ('cycle' modu): kayıtlar kuyrukta bekler, tur bitince gönderilir
+        self._held = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._loop, name=f'notification-{self.channel}', daemon=True)
+        self.thread.start()
+
+    def wake(self):
+        """New entries were queued"""
+        self._wake.set()
+
+    def hold(self):
+        """Keep queued entries until release() (they stay in the outbox meanwhile)"""
+        self._held.set()
+
+    def release(self):
+        self._held.clear()
+        self._wake.set()
+
+    def flush(self, timeout=60):
+        """Send everything due now, ignoring the batch window (used before exit)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            row_ids, listings = self.outbox.due(self.channel, self.max_batch)
+            if not row_ids:
+                return True
+            if not self._send(row_ids, listings):
+                return False
+        return False
+
+    def stop(self, timeout=10, flush_timeout=30):
+        """Stop the thread, try to deliver what is due and close the sink"""
+        self._stop.set()
+        self._wake.set()
+        if self.thread:
+            self.thread.join(timeout)
+            self.thread = None
+        if flush_timeout:
+            self.flush(flush_timeout)
+        self.sink.close()
+
+    def _ready_to_send(self):
+        if self._held.is_set():
+            return False
+        oldest = self.outbox.oldest_pending_at(self.channel)
+        if oldest is None:
+            return False
+        if time.time() - oldest >= self.batch_window_seconds:
+            return True
+        row_ids, _ = self.outbox.due(self.channel, self.max_batch)
+        return len(row_ids) >= self.max_batch
+
+    def _send(self, row_ids, listings):
+        start = time.perf_counter()
+        try:
+            sent, error = self.sink.send(listings)
+        except Exception as e:
+            sent, error = False, e
+
+        if self.metrics:
+            self.metrics.observe(f'{self.sink.kind}_send', time.perf_counter() - start, sink=self.channel)
+            self.metrics.inc('notifications', len(row_ids), sink=self.channel, result='sent' if sent else 'failed')
+
+        if sent:
+            if self.metrics:
+                # Kuyruğa girişten teslimata kadar geçen süre
+                now = time.time()
+                for queued_at in self.outbox.queued_at(row_ids):
+                    self.metrics.observe('notification_delay', now - queued_at, sink=self.channel)
+            self.outbox.mark_sent(row_ids)
+            logging.info(f"[{self.channel}] Notification sent for {len(row_ids)} listings")
+            return True
+
+        self.outbox.mark_failed(row_ids, error, self.retry_base_seconds, self.retry_max_seconds)
+        logging.warning(f"[{self.channel}] Notification for {len(row_ids)} listings failed ({error}), will retry")
+        return False
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self._ready_to_send():
+                    row_ids, listings = self.outbox.due(self.channel, self.max_batch)
+                    if row_ids:
+                        self._send(row_ids, listings)
+                        continue
+            except Exception as e:
+                logging.error(f"[{self.channel}] Notification sender error: {e}")
+
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+
+SENDER_OPTIONS = ('batch_window_seconds', 'max_batch', 'retry_base_seconds', 'retry_max_seconds', 'poll_seconds')
+
+
+def build_notifiers(outbox, email_sender, config, metrics=None):
+    """
+    One NotificationSender per entry in config['notifications']['sinks']
+    (default: a single email sink). Sender options set on a sink override
+    the ones set directly under 'notifications'.
+    """
+    notifications = config.get('notifications', {})
+    defaults = {key: notifications[key] for key in SENDER_OPTIONS if key in notifications}
+
+    notifiers = []
+    for sink_config in notifications.get('sinks', [{'type': 'email'}]):
+        if not sink_config.get('enabled', True):
+            continue
+        sink_type = sink_config.get('type', 'email')
+        name = sink_config.get('name', sink_type)
+        if sink_type == 'email':
+            sink = EmailSink(email_sender, name=name)
+        elif sink_type == 'webhook':
+            sink = WebhookSink(sink_config['url'], name=name, timeout=sink_config.get('timeout', 10),
+                               headers=sink_config.get('headers'))
+        else:
+            logging.warning(f"Unknown notification sink type: {sink_type}")
+            continue
+
+        options = dict(defaults)
+        options.update({key: sink_config[key] for key in SENDER_OPTIONS if key in sink_config})
+        notifiers.append(NotificationSender(outbox, sink, metrics=metrics, **options))
+    return notifiers
@@ -0,0 +1,279 @@
+"""
+Arama ve detay sayfası HTML parser'ları (BeautifulSoup ve hızlı lxml backend)
+"""
+from bs4 import BeautifulSoup, SoupStrainer
+
+from listing_fields import normalize_listing
+
+try:
+    from lxml import etree as lxml_etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+BASE_URL = 'https://www.sahibinden.com'
+
+# Kaput kontrolü - Kaputun temiz olması gerekiyor
+HOOD_KEYWORDS = ['kaput', 'ön kaput', 'motor kaputu']
+
+
+def build_damage_info(painted_parts, replaced_parts, local_painted_parts):
+    """Damage info dict (counts + hood status) from the three part lists"""
+    hood_damaged = False
+    hood_damage_type = None
+
+    for keyword in HOOD_KEYWORDS:
+        # Boyalı kontrolü
+        if any(keyword.lower() in part.lower() for part in painted_parts):
+            hood_damaged = True
+            hood_damage_type = 'boyalı'
+            break
+        # Değişen kontrolü
+        if any(keyword.lower() in part.lower() for part in replaced_parts):
+            hood_damaged = True
+            hood_damage_type = 'değişen'
+            break
+        # Lokal boyalı kontrolü
+        if any(keyword.lower() in part.lower() for part in local_painted_parts):
+            hood_damaged = True
+            hood_damage_type = 'lokal boyalı'
+            break
+
+    return {
+        'painted_parts': painted_parts,
+        'replaced_parts': replaced_parts,
+        'local_painted_parts': local_painted_parts,
+        'painted_count': len(painted_parts),
+        'replaced_count': len(replaced_parts),
+        'local_painted_count': len(local_painted_parts),
+        'hood_damaged': hood_damaged,
+        'hood_damage_type': hood_damage_type
+    }
+
+
+def classify_damage_list(title_text, title_classes, part_names, parts):
+    """Put one damage <ul> into the painted / replaced / local slot of parts"""
+    if 'Boyalı' in title_text and 'painted-new' in title_classes:
+        parts['painted'] = part_names
+    elif 'Değişen' in title_text and 'changed-new' in title_classes:
+        parts['replaced'] = part_names
+    elif 'Lokal' in title_text:
+        parts['local'] = part_names
+
+
+class BeautifulSoupParser:
+    """Pure-Python backend; only the result rows / damage area are parsed"""
+
+    name = 'bs4'
+
+    def __init__(self, base_url=BASE_URL):
+        self.base_url = base_url
+
+    def parse_listings(self, html, brand_name):
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('tbody', class_='searchResultsRowClass'))
+
+        listings = []
+        for tbody in soup.find_all('tbody', class_='searchResultsRowClass'):
+            rows = tbody.find_all('tr', class_='searchResultsItem')
+
+            for row in rows:
+                if 'nativeAd' in row.get('class', []):
+                    continue
+
+                listing_id = row.get('data-id')
+                if not listing_id:
+                    continue
+
+                title_elem = row.find('a', class_='classifiedTitle')
+                if not title_elem:
+                    continue
+
+                title = title_elem.get('title', '')
+                url = title_elem.get('href', '')
+
+                if url and not url.startswith('http'):
+                    url = self.base_url + url
+
+                year_elem = row.find_all('td', class_='searchResultsAttributeValue')
+                price_elem = row.find('td', class_='searchResultsPriceValue')
+                location_elem = row.find('td', class_='searchResultsLocationValue')
+
+                year = year_elem[0].text.strip() if len(year_elem) > 0 else 'N/A'
+                km = year_elem[1].text.strip() if len(year_elem) > 1 else 'N/A'
+                color = year_elem[2].text.strip() if len(year_elem) > 2 else 'N/A'
+
+                price = 'N/A'
+                if price_elem:
+                    price_span = price_elem.find('span')
+                    if price_span:
+                        price = price_span.text.strip()
+
+                location = 'N/A'
+                location_parts = []
+                if location_elem:
+                    location = location_elem.text.strip().replace('\n', ' ')
+                    # İl ve ilçe ayrı text node'larda (<br> ile ayrılmış)
+                    location_parts = list(location_elem.stripped_strings)
+
+                listings.append(normalize_listing({
+                    'id': listing_id,
+                    'title': title,
+                    'url': url,
+                    'year': year,
+                    'km': km,
+                    'color': color,
+                    'price': price,
+                    'location': location,
+                    'brand': brand_name
+                }, location_parts))
+
+        return listings
+
+    def parse_damage_info(self, html):
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('div', class_='custom-area'))
+
+        damage_area = soup.find('div', class_='custom-area')
+        if not damage_area:
+            return None
+
+        parts = {'painted': [], 'replaced': [], 'local': []}
+        info_list = damage_area.find('div', class_='car-damage-info-list')
+        if info_list:
+            for ul in info_list.find_all('ul'):
+                title = ul.find('li', class_='pair-title')
+                if not title:
+                    continue
+
+                part_names = [part.text.strip() for part in ul.find_all('li', class_='selected-damage')]
+                classify_damage_list(title.text.strip(), title.get('class', []), part_names, parts)
+
+        return build_damage_info(parts['painted'], parts['replaced'], parts['local'])
+
+
+def _has_class(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+class LxmlParser:
+    """C-backed lxml backend with XPath extraction of the same fields"""
+
+    name = 'lxml'
+
+    ROWS = f"//tbody[{_has_class('searchResultsRowClass')}]//tr[{_has_class('searchResultsItem')}]"
+    TITLE = f".//a[{_has_class('classifiedTitle')}]"
+    ATTRIBUTES = f".//td[{_has_class('searchResultsAttributeValue')}]"
+    PRICE = f".//td[{_has_class('searchResultsPriceValue')}]"
+    LOCATION = f".//td[{_has_class('searchResultsLocationValue')}]"
+    DAMAGE_AREA = f"//div[{_has_class('custom-area')}]"
+    DAMAGE_LIST = f".//div[{_has_class('car-damage-info-list')}]"
+    PAIR_TITLE = f".//li[{_has_class('pair-title')}]"
+    SELECTED_DAMAGE = f".//li[{_has_class('selected-damage')}]"
+
+    def __init__(self, base_url=BASE_URL):
+        if lxml_html is None:
+            raise ImportError('lxml is not installed')
+        self.base_url = base_url
+
+    def _parse_tree(self, html):
+        try:
+            return lxml_html.fromstring(html)
+        except ValueError:
+            # XML encoding bildirimi olan unicode string'leri lxml kabul etmiyor
+            return lxml_html.fromstring(html.encode('utf-8'))
+        except lxml_etree.ParserError:
+            return None
+
+    def parse_listings(self, html, brand_name):
+        tree = self._parse_tree(html)
+        if tree is None:
+            return []
+
+        listings = []
+        for row in tree.xpath(self.ROWS):
+            if 'nativeAd' in (row.get('class') or '').split():
+                continue
+
+            listing_id = row.get('data-id')
+            if not listing_id:
+                continue
+
+            title_elems = row.xpath(self.TITLE)
+            if not title_elems:
+                continue
+            title_elem = title_elems[0]
+
+            title = title_elem.get('title', '')
+            url = title_elem.get('href', '')
+
+            if url and not url.startswith('http'):
+                url = self.base_url + url
+
+            year_elem = row.xpath(self.ATTRIBUTES)
+            price_elems = row.xpath(self.PRICE)
+            location_elems = row.xpath(self.LOCATION)
+
+            year = year_elem[0].text_content().strip() if len(year_elem) > 0 else 'N/A'
+            km = year_elem[1].text_content().strip() if len(year_elem) > 1 else 'N/A'
+            color = year_elem[2].text_content().strip() if len(year_elem) > 2 else 'N/A'
+
+            price = 'N/A'
+            if price_elems:
+                price_spans = price_elems[0].xpath('.//span')
+                if price_spans:
+                    price = price_spans[0].text_content().strip()
+
+            location = 'N/A'
+            location_parts = []
+            if location_elems:
+                location = location_elems[0].text_content().strip().replace('\n', ' ')
+                location_parts = [text.strip() for text in location_elems[0].itertext() if text.strip()]
+
+            listings.append(normalize_listing({
+                'id': listing_id,
+                'title': title,
+                'url': url,
+                'year': year,
+                'km': km,
+                'color': color,
+                'price': price,
+                'location': location,
+                'brand': brand_name
+            }, location_parts))
+
+        return listings
+
+    def parse_damage_info(self, html):
+        tree = self._parse_tree(html)
+        if tree is None:
+            return None
+
+        damage_areas = tree.xpath(self.DAMAGE_AREA)
+        if not damage_areas:
+            return None
+
+        parts = {'painted': [], 'replaced': [], 'local': []}
+        info_lists = damage_areas[0].xpath(self.DAMAGE_LIST)
+        if info_lists:
+            for ul in info_lists[0].iter('ul'):
+                titles = ul.xpath(self.PAIR_TITLE)
+                if not titles:
+                    continue
+
+                title = titles[0]
+                part_names = [part.text_content().strip() for part in ul.xpath(self.SELECTED_DAMAGE)]
+                classify_damage_list(title.text_content().strip(), (title.get('class') or '').split(), part_names, parts)
+
+        return build_damage_info(parts['painted'], parts['replaced'], parts['local'])
+
+
+PARSERS = {
+    'bs4': BeautifulSoupParser,
+    'lxml': LxmlParser,
+}
+
+
+def get_parser(name='auto', base_url=BASE_URL):
+    """'auto' picks lxml when it is installed, otherwise BeautifulSoup"""
+    if name == 'auto':
+        name = 'lxml' if lxml_html is not None else 'bs4'
+    return PARSERS[name](base_url)
@@ -0,0 +1,85 @@
+"""
+Sabit time.sleep yerine sayfa hazır olduğu anda dönen bekleme katmanı,
+insansı gecikmeler ise ayrı bir pacing politikası
+"""
+import logging
+import random
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+READY = 'ready'
+RATE_LIMITED = 'rate_limited'
+LOGIN = 'login'
+CHALLENGE = 'challenge'
+TIMEOUT = 'timeout'
+
+
+def detect_page_state(driver, ready_locator):
+    """Current page state, or False while the page is still loading"""
+    current_url = driver.current_url
+    if 'olagan-disi-kullanim' in current_url or driver.find_elements(By.CSS_SELECTOR, ".error-page-container.too-many-requests"):
+        return RATE_LIMITED
+    if 'login' in current_url.lower() or 'secure.sahibinden.com' in current_url:
+        return LOGIN
+    if driver.find_elements(By.ID, "btn-continue"):
+        return CHALLENGE
+    if driver.find_elements(*ready_locator):
+        return READY
+    return False
+
+
+def wait_for_page(driver, ready_locator, timeout=20, poll_frequency=0.25):
+    """
+    Returns as soon as the page is ready, blocked, on login or on a Cloudflare
+    challenge; TIMEOUT if none of these happened within timeout seconds.
+    """
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(
+            lambda d: detect_page_state(d, ready_locator)
+        )
+    except TimeoutException:
+        return TIMEOUT
+
+
+def wait_for_document(driver, timeout=10, poll_frequency=0.25):
+    """Wait until document.readyState is 'complete'"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(
+            lambda d: d.execute_script('return document.readyState') == 'complete'
+        )
+        return True
+    except TimeoutException:
+        return False
+
+
+# config'te pacing verilmezse kullanılan [min, max] saniye aralıkları;
+# scraper ve detay worker'ları aynı değerleri kullanır
+DEFAULT_PACING = {
+    'page_load': (1, 3),
+    'between_listings': (1, 3)
+}
+
+
+class PacingPolicy:
+    """Random human-like pause between min_delay and max_delay seconds"""
+
+    def __init__(self, min_delay, max_delay, label='Waiting'):
+        self.min_delay = min_delay
+        self.max_delay = max(min_delay, max_delay)
+        self.label = label
+
+    @classmethod
+    def from_config(cls, config, key, label='Waiting'):
+        """Read a [min, max] pair from config['pacing'][key], DEFAULT_PACING[key] if missing"""
+        min_delay, max_delay = config.get('pacing', {}).get(key, DEFAULT_PACING[key])
+        return cls(min_delay, max_delay, label)
+
+    def pause(self):
+        delay = random.uniform(self.min_delay, self.max_delay)
+        if delay > 0:
+            logging.info(f"{self.label} {delay:.1f}s...")
+            time.sleep(delay)
+        return delay
@@ -0,0 +1,108 @@
+"""
+Adaptif istek hızı: token bucket + AIMD (blokta yarıya düşür, başarıda yavaşça artır)
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+
+class AdaptiveRateController:
+    """
+    Sayfa istekleri için token bucket. Rate limit / Cloudflare görülünce dolum
+    hızı yarıya iner ve üstel bekleme süresi döner; art arda success_threshold
+    başarılı istekten sonra hız increase_step kadar artar. Durum turlar
+    arasında state_file'da saklanır.
+    """
+
+    def __init__(self, state_file, rate_per_minute=10, min_rate=1, max_rate=30, burst=3,
+                 increase_step=1, success_threshold=20, backoff_base_seconds=60, backoff_max_seconds=900):
+        self.state_file = state_file
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase_step = increase_step
+        self.success_threshold = success_threshold
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._lock = threading.Lock()
+
+        self.rate = rate_per_minute
+        self.tokens = burst
+        self.last_refill = time.time()
+        self.successes = 0
+        self.consecutive_blocks = 0
+        self.total_blocks = 0
+        self.last_block_at = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.rate = min(self.max_rate, max(self.min_rate, state.get('rate', self.rate)))
+            self.consecutive_blocks = state.get('consecutive_blocks', 0)
+            self.total_blocks = state.get('total_blocks', 0)
+            self.last_block_at = state.get('last_block_at')
+        except Exception as e:
+            logging.debug(f"Could not load rate state: {e}")
+
+    def save(self):
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logging.debug(f"Could not save rate state: {e}")
+
+    def snapshot(self):
+        return {
+            'rate': round(self.rate, 2),
+            'tokens': round(self.tokens, 2),
+            'consecutive_blocks': self.consecutive_blocks,
+            'total_blocks': self.total_blocks,
+            'last_block_at': self.last_block_at
+        }
+
+    def _refill(self):
+        now = time.time()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate / 60)
+        self.last_refill = now
+
+    def acquire(self):
+        """Block until a request token is available, returns seconds waited"""
+        waited = 0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) * 60 / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_blocks = 0
+            if self.successes >= self.success_threshold and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                self.successes = 0
+                logging.info(f"Rate controller: {self.success_threshold} clean requests, probing up to {self.rate:.1f} req/min")
+
+    def record_block(self):
+        """Halve the rate and return how long to back off before retrying"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+            self.successes = 0
+            self.consecutive_blocks += 1
+            self.total_blocks += 1
+            self.last_block_at = time.time()
+            backoff = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (self.consecutive_blocks - 1))
+        logging.warning(f"Rate controller: block detected, slowing down to {self.rate:.1f} req/min")
+        self.save()
+        return backoff
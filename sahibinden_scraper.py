@@ -2,40 +2,140 @@ import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
 import time
-import random
 import json
 import logging
-import schedule
+from logging.handlers import RotatingFileHandler
+import argparse
+import hashlib
+import threading
 from datetime import datetime
 import os
+import signal
+from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
+from concurrent.futures import ThreadPoolExecutor
+from page_readiness import (
+    PacingPolicy, wait_for_page, wait_for_document,
+    READY, RATE_LIMITED, LOGIN, CHALLENGE
+)
 from email_sender import EmailSender
+from worker_pool import DetailWorkerPool
+from rate_controller import AdaptiveRateController
+from scraper_ipc import CommandServer, load_authkey
+from page_parsers import BASE_URL, get_parser
+from metrics import StageMetrics, timed
+from event_log import EventLog
+from brand_scheduler import BrandScheduler, by_priority, order_listings
+from notification_outbox import NotificationOutbox, build_notifiers
+from http_fetcher import BLOCKED, EMPTY, OK, UNAVAILABLE, HttpFetcher
+from filters import evaluate_listing, refilter, get_prefilter, prefilter_listing
+from seen_store import SeenAdStore
+from listing_store import ListingStore
+
+# Log dosyası boyut sınırına gelince döndürülür (.1, .2 ...), dashboard sadece güncel dosyanın sonunu okur
+LOG_MAX_BYTES = int(os.getenv('SCRAPER_LOG_MAX_MB', '10')) * 1024 * 1024
+LOG_BACKUP_COUNT = int(os.getenv('SCRAPER_LOG_BACKUPS', '3'))
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('sahibinden_scraper.log', encoding='utf-8'),
+        RotatingFileHandler('sahibinden_scraper.log', maxBytes=LOG_MAX_BYTES,
+                            backupCount=LOG_BACKUP_COUNT, encoding='utf-8'),
         logging.StreamHandler()
     ]
 )
 
+# Chrome ve HTTP istemcisi aynı user agent'ı kullanır
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
+
 class SahibindenScraper:
+    # uc.Chrome aynı anda birden fazla thread'den başlatılırsa chromedriver patch'i çakışıyor
+    _driver_init_lock = threading.Lock()
+
     def __init__(self, config_file='config.json'):
+        # Her thread (ana thread + detay worker'ları) kendi Chrome oturumunu tutar
+        self._local = threading.local()
+        self._lock = threading.RLock()
         self.driver = None
         self.config = self.load_config(config_file)
         self.max_replaced_parts = self.config.get('max_replaced_parts', 1)
         self.max_painted_parts = self.config.get('max_painted_parts', 2)
+        self.detail_workers = max(1, int(self.config.get('detail_workers', 1)))
+        self.worker_pool = None
+        # Sürekli çalışan modda dashboard'dan gelen komutlar
+        self.run_now_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.cycle_running = False
+        # Marka bazında interval_minutes / priority
+        self.scheduler = BrandScheduler(self.config.get('check_interval_minutes', 30))
+        # İnsansı gecikmeler sayfa hazır olma beklemesinden ayrı ve ayarlanabilir
+        self.page_pacing = PacingPolicy.from_config(self.config, 'page_load', 'Page ready, pausing')
+        self.listing_pacing = PacingPolicy.from_config(self.config, 'between_listings', 'Waiting before next listing:')
         self.filtered_listings = []
+        self.prefiltered_count = 0
+        # Testlerde mock_server.py'ye yönlendirmek için değiştirilebilir
+        self.base_url = self.config.get('base_url', BASE_URL).rstrip('/')
+        # HTTP ile alınamayan sayfalar için Chrome açılsın mı
+        self.browser_fallback = self.config.get('browser_fallback', True)
+        # lxml kuruluysa hızlı parser, yoksa BeautifulSoup
+        self.parser = get_parser(self.config.get('parser_backend', 'auto'), base_url=self.base_url)
         # Docker volume'da saklamak için /app/data kullan, yoksa mevcut dizin
         self.data_dir = '/app/data' if os.path.exists('/app/data') else '.'
         self.seen_ads_file = os.path.join(self.data_dir, 'seen_ads.json')
         self.cookies_file = os.path.join(self.data_dir, 'sahibinden_cookies.json')
         self.status_file = os.path.join(self.data_dir, 'scraper_status.json')
         self.otp_file = os.path.join(self.data_dir, 'otp_code.json')
+        self.db_file = os.path.join(self.data_dir, 'sahibinden.db')
+        # Aşama süreleri; dashboard /metrics bu snapshot'ı okur
+        self.metrics = StageMetrics(os.path.join(self.data_dir, 'metrics.json'))
+        # Kararlar, sayfa istekleri, rate limit ve tur özetleri JSON-lines olarak
+        self.events = EventLog.from_config(os.path.join(self.data_dir, 'events.jsonl'), self.config)
+        self.seen_ads_expire_days = self.config.get('seen_ads_expire_days', 0)
         self.seen_ads = self.load_seen_ads()
+        # Görüldü kaydı silinen (expire) ilanlar tekrar gelirse hasar bilgisi listing_store'dan okunur;
+        # seen_ads_expire_days=0 iken görülen ilan tekrar kontrol edilmediği için cache'e bakılmaz
+        self.detail_cache_seconds = self.config.get('detail_cache_ttl_hours', 168) * 3600
+        self.detail_cache_max_entries = self.config.get('detail_cache_max_entries', 5000)
+        # Kabul/ret tüm ilanların geçmişi; eski filtered_listings.json bir kere içe aktarılır
+        self.listing_store = ListingStore(
+            self.db_file,
+            legacy_json_file=os.path.join(self.data_dir, 'filtered_listings.json')
+        )
+        self.listing_store.drop_legacy_detail_cache()
+        # Detay sayfası alınamayan ilanlar seen'e eklenmez, bu kadar denemeden sonra bırakılır
+        # (deneme sayıları seen_ads ile aynı veritabanında)
+        self.max_detail_attempts = self.config.get('max_detail_attempts', 3)
         self.email_sender = EmailSender()
+        # Kabul edilen ilanlar diske kuyruklanır, her kanal (e-posta, webhook) arka planda gönderir
+        self.outbox = NotificationOutbox(self.db_file)
+        self.notifiers = build_notifiers(self.outbox, self.email_sender, self.config, metrics=self.metrics)
+        # 'stream': ilan kabul edildiği anda kuyruğa girer, 'cycle': tur sonunda toplu
+        self.notification_mode = self.config.get('notifications', {}).get('mode', 'cycle')
+        # Cookie'ler geçerliyse sayfalar Chrome açmadan HTTP ile çekilir
+        # Tüm sayfa istekleri (HTTP + tarayıcı) ortak, adaptif token bucket'tan geçer
+        self.rate_controller = AdaptiveRateController(
+            os.path.join(self.data_dir, 'rate_state.json'),
+            **self.config.get('rate_limit', {})
+        )
+        self.http_fetcher = None
+        if self.config.get('http_first', True):
+            self.http_fetcher = HttpFetcher(
+                self.cookies_file, USER_AGENT,
+                pool_size=self.detail_workers * 2,
+                cooldown_seconds=self.config.get('http_block_cooldown_seconds', 600),
+                on_success=self.rate_controller.record_success,
+                on_block=lambda: self.record_block('http')
+            )
+
+    @property
+    def driver(self):
+        """Chrome driver of the current thread"""
+        return getattr(self._local, 'driver', None)
+
+    @driver.setter
+    def driver(self, value):
+        self._local.driver = value
 
     def load_config(self, config_file):
         try:
@@ -51,18 +151,24 @@ class SahibindenScraper:
             }
 
     def load_seen_ads(self):
-        try:
-            with open(self.seen_ads_file, 'r', encoding='utf-8') as f:
-                return set(json.load(f))
-        except:
-            return set()
+        # Eski seen_ads.json varsa bir kere SQLite'a aktarılır
+        store = SeenAdStore(self.db_file, legacy_json_file=self.seen_ads_file)
+        logging.info(f"Loaded {len(store)} seen ads")
+        return store
 
     def save_seen_ads(self):
-        with open(self.seen_ads_file, 'w', encoding='utf-8') as f:
-            json.dump(list(self.seen_ads), f, ensure_ascii=False, indent=2)
+        # Eklemeler anında diske yazılıyor, burada sadece eski kayıtlar temizlenir
+        if self.seen_ads_expire_days:
+            expired = self.seen_ads.expire(self.seen_ads_expire_days)
+            if expired:
+                logging.info(f"Expired {expired} seen ads older than {self.seen_ads_expire_days} days")
 
-    def update_status(self, running=None, login_waiting=None, message=None):
+    def update_status(self, running=None, login_waiting=None, message=None, **extra):
         """Persist scraper status so dashboard can read it"""
+        with self._lock:
+            self._write_status(running, login_waiting, message, extra)
+
+    def _write_status(self, running, login_waiting, message, extra):
         status = {
             'running': False,
             'login_waiting': False,
@@ -82,6 +188,9 @@ class SahibindenScraper:
             status['login_waiting'] = login_waiting
         if message is not None:
             status['message'] = message
+        status.update(extra)
+        status['rate_limit'] = self.rate_controller.snapshot()
+        status['notifications'] = self.outbox.stats()
 
         status['timestamp'] = datetime.now().isoformat()
 
@@ -116,20 +225,24 @@ class SahibindenScraper:
         except Exception:
             return False
 
-    def handle_rate_limit_wait(self, wait_seconds=900, retries=2):
+    def handle_rate_limit_wait(self, retries=3):
         """
-        If rate limit page is shown, wait in 15-minute chunks (default 2 tries).
-        Returns True if page is cleared, False if still blocked after retries.
+        If rate limit page is shown, back off as told by the rate controller
+        (exponential, capped) and retry. Returns True if page is cleared,
+        False if still blocked after retries.
         """
         for attempt in range(retries):
             if not self.is_rate_limited():
                 return True
-            logging.warning(f"Rate limit page detected (attempt {attempt+1}/{retries}). Waiting {wait_seconds//60} minutes...")
-            self.update_status(message=f"Rate limit tespit edildi, {wait_seconds//60} dk bekleniyor (deneme {attempt+1}/{retries})")
-            time.sleep(wait_seconds)
+            wait_seconds = self.record_block('rate_limit_page')
+            logging.warning(f"Rate limit page detected (attempt {attempt+1}/{retries}). Waiting {wait_seconds/60:.1f} minutes...")
+            self.update_status(message=f"Rate limit tespit edildi, {wait_seconds/60:.1f} dk bekleniyor (deneme {attempt+1}/{retries})")
+            with self.metrics.timer('rate_limit_wait', reason='backoff'):
+                time.sleep(wait_seconds)
             logging.info("Retrying after wait...")
+            self.acquire_rate_token()
             self.driver.refresh()
-            time.sleep(5)
+            wait_for_document(self.driver)
 
         if self.is_rate_limited():
             logging.error("Still blocked by rate limit after retries")
@@ -173,6 +286,7 @@ class SahibindenScraper:
         except Exception as e:
             logging.error(f"Error saving cookies: {e}")
 
+    @timed('cookie_load')
     def load_cookies(self):
         """Kaydedilmiş cookies'leri yükle"""
         try:
@@ -185,8 +299,8 @@ class SahibindenScraper:
                 cookies = json.load(f)
 
             # Önce sahibinden.com'a git (cookie eklemek için domain gerekli)
-            self.driver.get('https://www.sahibinden.com')
-            time.sleep(2)
+            self.driver.get(self.base_url)
+            wait_for_document(self.driver)
 
             # Cookies'leri ekle
             for cookie in cookies:
@@ -231,7 +345,7 @@ class SahibindenScraper:
             current_url = self.driver.current_url
             if 'login' not in current_url.lower() and 'secure.sahibinden.com' not in current_url:
                 logging.info("Login successful!")
-                time.sleep(3)  # Sayfanın tamamen yüklenmesi için
+                wait_for_document(self.driver)  # Sayfanın tamamen yüklenmesi için
                 self.save_cookies()
                 self.update_status(login_waiting=False, message="Login tamamlandı, scraping devam ediyor")
                 return True
@@ -254,7 +368,7 @@ class SahibindenScraper:
                             self.driver.get(resume_url)
                         else:
                             self.driver.refresh()
-                        time.sleep(5)
+                        wait_for_document(self.driver)
                         continue
             except Exception as e:
                 logging.debug(f"Cookie reload check failed: {e}")
@@ -289,26 +403,28 @@ class SahibindenScraper:
         options.add_argument('--disable-notifications')
 
         # User agent
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36')
+        options.add_argument(f'user-agent={USER_AGENT}')
 
         # Dil ayarları
         options.add_argument('--lang=tr-TR')
 
         return options
 
+    @timed('driver_init')
     def init_driver(self):
         logging.info("Initializing undetected Chrome driver...")
 
         try:
             # Version'ı otomatik tespit ettir, headless=False ama Xvfb kullanacağız
             options = self.get_chrome_options()
-            self.driver = uc.Chrome(options=options, headless=False, use_subprocess=True)
+            with self._driver_init_lock:
+                self.driver = uc.Chrome(options=options, headless=False, use_subprocess=True)
             logging.info("Driver initialized successfully")
 
             # JavaScript injection - webdriver flaglerini gizle
             try:
                 self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-                    "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
+                    "userAgent": USER_AGENT
                 })
                 self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
                 logging.info("Stealth JavaScript injected successfully")
@@ -324,13 +440,14 @@ class SahibindenScraper:
             logging.info("Retrying with specific Chrome version...")
             try:
                 options = self.get_chrome_options()  # Yeni options object
-                self.driver = uc.Chrome(options=options, version_main=131, headless=False, use_subprocess=True)
+                with self._driver_init_lock:
+                    self.driver = uc.Chrome(options=options, version_main=131, headless=False, use_subprocess=True)
                 logging.info("Driver initialized successfully with version 131")
 
                 # JavaScript injection
                 try:
                     self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-                        "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
+                        "userAgent": USER_AGENT
                     })
                     self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
                     logging.info("Stealth JavaScript injected successfully")
@@ -346,251 +463,321 @@ class SahibindenScraper:
 
     def handle_cloudflare_challenge(self):
         try:
-            continue_button = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.ID, "btn-continue"))
-            )
             logging.info("Cloudflare Turnstile challenge detected!")
             logging.info("Waiting for Turnstile widget to load...")
-            time.sleep(5)
+            continue_button = WebDriverWait(self.driver, 10).until(
+                EC.element_to_be_clickable((By.ID, "btn-continue"))
+            )
 
             logging.info("Clicking 'Devam Et' button...")
             continue_button.click()
 
             logging.info("Waiting for challenge to complete...")
-            time.sleep(8)
+            WebDriverWait(self.driver, 15).until(EC.staleness_of(continue_button))
 
             return True
         except:
             return False
 
-    def get_listings(self, url, brand_name):
-        logging.info(f"Navigating to: {url}")
+    def open_page(self, url, ready_locator, timeout):
+        """
+        Navigate and drive the page through rate-limit, login and Cloudflare
+        states until ready_locator is present. Returns the final page state.
+        """
+        self.ensure_driver()
+        self.acquire_rate_token()
         self.driver.get(url)
 
-        # İlk bekleme - sayfanın yüklenmesi için
-        time.sleep(7)
-
-        # Rate limit kontrolü: 15 dk bekle, tekrar aynıysa bir 15 dk daha bekle
-        if self.is_rate_limited():
-            if not self.handle_rate_limit_wait():
-                logging.warning("Rate limit kalkmadı, arama sayfası atlanıyor")
-                return []
-
-        # Login sayfasına yönlendirildik mi kontrol et
-        current_url = self.driver.current_url
-        if 'login' in current_url.lower() or 'secure.sahibinden.com' in current_url:
-            logging.warning("Redirected to login page")
-            logging.info(f"Current URL: {current_url}")
-
-            # Manuel login'i bekle
-            if not self.handle_login_if_needed(resume_url=url):
-                logging.error("Login failed or timeout - skipping this brand")
-                self.driver.save_screenshot("login_failed.png")
-                return []
+        state = None
+        for _ in range(4):
+            with self.metrics.timer('readiness_wait'):
+                state = wait_for_page(self.driver, ready_locator, timeout)
+            if state == READY:
+                self.rate_controller.record_success()
+                self.page_pacing.pause()
+                return state
+
+            if state == RATE_LIMITED:
+                # Rate limit: rate controller'ın söylediği kadar bekle (60 sn'den başlayıp üstel artar, en fazla 15 dk)
+                if not self.handle_rate_limit_wait():
+                    return state
+            elif state == LOGIN:
+                logging.warning("Redirected to login page")
+                logging.info(f"Current URL: {self.driver.current_url}")
+                # Manuel login'i bekle
+                if not self.handle_login_if_needed(resume_url=url):
+                    return state
+                logging.info("Login successful, reloading page...")
+                self.acquire_rate_token()
+                self.driver.get(url)
+            elif state == CHALLENGE:
+                self.record_block('challenge')
+                if not self.handle_cloudflare_challenge():
+                    return state
+                logging.info("Cloudflare challenge handled, continuing...")
+            else:
+                return state
 
-            # Login başarılı, sayfayı yeniden yükle
-            logging.info("Login successful, reloading search page...")
-            self.driver.get(url)
-            time.sleep(7)
+        return state
 
-        # Cloudflare challenge kontrolü
-        if self.handle_cloudflare_challenge():
-            logging.info("Cloudflare challenge handled, continuing...")
-            time.sleep(5)
+    def ensure_driver(self):
+        """Start this thread's browser only when a page really needs it"""
+        if not self.driver:
+            self.init_driver()
 
+    def check_driver_health(self):
+        """Restart this thread's browser if it stopped responding"""
+        if not self.driver:
+            return True
         try:
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "searchResultsItem"))
-            )
-            logging.info("Search results page loaded")
-            time.sleep(2)  # Sayfanın tamamen render olması için
+            self.driver.execute_script('return 1')
+            return True
         except Exception as e:
-            logging.error(f"Error loading search results: {e}")
-            logging.info("Current URL: " + self.driver.current_url)
-            logging.info("Saving screenshot for debugging...")
-            self.driver.save_screenshot("error_screenshot.png")
-            return []
-
-        html = self.driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
+            logging.warning(f"Browser health check failed ({e}), restarting browser...")
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+            self.init_driver()
+            return False
 
+    def fetch_http(self, url, ready_marker, kind):
+        """HTTP-first fetch through the rate controller, (result, html) as in HttpFetcher.fetch"""
+        if not self.http_fetcher or not self.http_fetcher.is_available():
+            return UNAVAILABLE, None
+        self.acquire_rate_token()
+        started = time.perf_counter()
+        result, html = self.http_fetcher.fetch(url, ready_marker)
+        self.log_event('page_fetch', kind=kind, via='http', url=url, ok=result == OK, result=result,
+                       seconds=round(time.perf_counter() - started, 3))
+        return result, html
+
+    def needs_browser(self, result):
+        """Only blocked pages (or no usable HTTP session) go to the browser"""
+        return result in (BLOCKED, UNAVAILABLE) and self.browser_fallback
+
+    def record_block(self, source):
+        """Tell the rate controller about a block, returns the backoff it asks for"""
+        backoff = self.rate_controller.record_block()
+        self.log_event('rate_limit', source=source, backoff_seconds=backoff,
+                       rate_per_minute=round(self.rate_controller.rate, 2))
+        return backoff
+
+    def log_event(self, event, **fields):
+        """Structured event tagged with the current brand/listing context"""
+        self.events.emit(event, **{**self.metrics.current_labels(), **fields})
+
+    def acquire_rate_token(self):
+        """Wait for the rate controller and record how long that took"""
+        waited = self.rate_controller.acquire()
+        self.metrics.observe('rate_limit_wait', waited, reason='throttle')
+        return waited
+
+    def get_listings(self, url, brand_name, max_pages=1, stop_at=None):
+        """
+        Reads up to max_pages result pages (pagingOffset). Stops early when a page
+        is empty or shorter than pagingSize (last page), repeats earlier rows or
+        contains the stop_at listing id.
+        """
         listings = []
-        tbody_elements = soup.find_all('tbody', class_='searchResultsRowClass')
+        seen_ids = set()
+        page_size = self.paging_size(url)
+
+        def add_page(page_listings):
+            """Append a page's new rows, returns False if paging should stop"""
+            fresh = [listing for listing in page_listings if listing['id'] not in seen_ids]
+            for listing in fresh:
+                seen_ids.add(listing['id'])
+            listings.extend(fresh)
+            if not fresh or len(page_listings) < page_size:
+                return False
+            return not (stop_at and any(listing['id'] == stop_at for listing in fresh))
+
+        if not add_page(self.get_search_page(url, brand_name)) or max_pages <= 1:
+            return listings
+
+        # Kalan sayfalar worker sayısı kadar paralel çekilir (sadece HTTP ile)
+        batch_size = max(1, self.detail_workers)
+        page_index = 1
+        with ThreadPoolExecutor(max_workers=batch_size) as executor:
+            while page_index < max_pages:
+                batch = list(range(page_index, min(page_index + batch_size, max_pages)))
+                page_index = batch[-1] + 1
+                page_urls = [self.build_page_url(url, index) for index in batch]
+                pages = list(executor.map(lambda page_url: self.get_search_page(page_url, brand_name, http_only=True), page_urls))
+
+                for page_url, page_listings in zip(page_urls, pages):
+                    if page_listings is None:
+                        # Geçici hata veya blok: sırayla tekrar dene (blokta bu thread'in tarayıcısıyla).
+                        # Sonuçların sonu sadece sonuçsuz 2xx sayfa ([]) ile anlaşılır
+                        logging.info(f"Retrying {page_url} for {brand_name}")
+                        page_listings = self.get_search_page(page_url, brand_name)
+                    if not add_page(page_listings):
+                        logging.info(f"Stopping pagination for {brand_name} after {len(listings)} listings")
+                        return listings
 
-        for tbody in tbody_elements:
-            rows = tbody.find_all('tr', class_='searchResultsItem')
+        return listings
 
-            for row in rows:
-                if 'nativeAd' in row.get('class', []):
-                    continue
+    def paging_size(self, url):
+        """pagingSize of a search URL (sahibinden default 20)"""
+        query = parse_qs(urlparse(url).query)
+        try:
+            return int(query.get('pagingSize', ['20'])[0])
+        except ValueError:
+            return 20
+
+    def build_page_url(self, url, page_index):
+        """Search URL of the given 0-based result page"""
+        if page_index == 0:
+            return url
+        parts = urlparse(url)
+        query = parse_qs(parts.query, keep_blank_values=True)
+        query['pagingOffset'] = [str(page_index * self.paging_size(url))]
+        return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+    def get_search_page(self, url, brand_name, http_only=False):
+        """
+        Parsed rows of one search page. With http_only=True returns None instead
+        of falling back to the browser.
+        """
+        logging.info(f"Navigating to: {url}")
 
-                listing_id = row.get('data-id')
-                if not listing_id:
-                    continue
+        with self.metrics.timer('search_navigation', via='http', brand=brand_name):
+            result, html = self.fetch_http(url, 'searchResultsItem', 'search')
+        if result == OK:
+            logging.info("Search results page loaded over HTTP")
+            self.metrics.inc('pages_fetched', kind='search', via='http', brand=brand_name)
+        elif result == EMPTY:
+            # Geçerli sayfa, sonuç yok
+            logging.info("Search page has no results")
+            return []
+        elif http_only:
+            return None
+        elif not self.needs_browser(result):
+            logging.warning(f"Search page not available over HTTP ({result}), skipping")
+            return []
+        else:
+            started = time.perf_counter()
+            with self.metrics.timer('search_navigation', via='browser', brand=brand_name):
+                html = self.load_search_page(url)
+            self.log_event('page_fetch', kind='search', via='browser', url=url, ok=html is not None,
+                           seconds=round(time.perf_counter() - started, 3))
+            if html is None:
+                return []
+            self.metrics.inc('pages_fetched', kind='search', via='browser', brand=brand_name)
 
-                title_elem = row.find('a', class_='classifiedTitle')
-                if not title_elem:
-                    continue
+        return self.parse_listings(html, brand_name)
 
-                title = title_elem.get('title', '')
-                url = title_elem.get('href', '')
-
-                if url and not url.startswith('http'):
-                    url = 'https://www.sahibinden.com' + url
-
-                year_elem = row.find_all('td', class_='searchResultsAttributeValue')
-                price_elem = row.find('td', class_='searchResultsPriceValue')
-                location_elem = row.find('td', class_='searchResultsLocationValue')
-
-                year = year_elem[0].text.strip() if len(year_elem) > 0 else 'N/A'
-                km = year_elem[1].text.strip() if len(year_elem) > 1 else 'N/A'
-                color = year_elem[2].text.strip() if len(year_elem) > 2 else 'N/A'
-
-                price = 'N/A'
-                if price_elem:
-                    price_span = price_elem.find('span')
-                    if price_span:
-                        price = price_span.text.strip()
-
-                location = 'N/A'
-                if location_elem:
-                    location = location_elem.text.strip().replace('\n', ' ')
-
-                listing = {
-                    'id': listing_id,
-                    'title': title,
-                    'url': url,
-                    'year': year,
-                    'km': km,
-                    'color': color,
-                    'price': price,
-                    'location': location,
-                    'brand': brand_name
-                }
-
-                listings.append(listing)
-                logging.info(f"Found listing: {listing_id} - {title}")
+    def load_search_page(self, url):
+        """Load a search page in the browser, returns page HTML or None"""
+        state = self.open_page(url, (By.CLASS_NAME, "searchResultsItem"), timeout=20)
+        if state == READY:
+            logging.info("Search results page loaded")
+            return self.driver.page_source
 
+        if state == RATE_LIMITED:
+            logging.warning("Rate limit kalkmadı, arama sayfası atlanıyor")
+        elif state == LOGIN:
+            logging.error("Login failed or timeout - skipping this brand")
+            self.driver.save_screenshot("login_failed.png")
+        else:
+            logging.error(f"Error loading search results: {state}")
+            logging.info("Current URL: " + self.driver.current_url)
+            logging.info("Saving screenshot for debugging...")
+            self.driver.save_screenshot("error_screenshot.png")
+        return None
+
+    def parse_listings(self, html, brand_name):
+        with self.metrics.timer('html_parse', page='search', brand=brand_name):
+            listings = self.parser.parse_listings(html, brand_name)
+        for listing in listings:
+            logging.info(f"Found listing: {listing['id']} - {listing['title']}")
         logging.info(f"Total listings found: {len(listings)}")
         return listings
 
     def get_damage_info(self, listing_url):
         logging.info(f"Checking damage info for: {listing_url}")
-        self.driver.get(listing_url)
-
-        # Daha uzun bekleme - insan gibi davranmak için
-        time.sleep(5)
 
-        # Rate limit kontrolü: 15 dk bekle, tekrar aynıysa bir 15 dk daha bekle
-        if self.is_rate_limited():
-            if not self.handle_rate_limit_wait():
-                logging.warning("Rate limit kalkmadı, ilan atlanıyor")
+        with self.metrics.timer('detail_fetch', via='http'):
+            result, html = self.fetch_http(listing_url, 'custom-area', 'detail')
+        if result == OK:
+            self.metrics.inc('pages_fetched', kind='detail', via='http')
+        else:
+            if not self.needs_browser(result):
+                # Kalkmış ilan, hasar alanı olmayan sayfa veya geçici hata: sonraki turda tekrar denenir
+                logging.warning(f"Detail page not available over HTTP ({result})")
                 return None
-
-        # Login kontrolü
-        if 'login' in self.driver.current_url.lower():
-            logging.warning("Redirected to login on detail page")
-
-            # Manuel login'i bekle
-            if not self.handle_login_if_needed(resume_url=listing_url):
-                logging.error("Login failed - cannot get damage info")
+            started = time.perf_counter()
+            with self.metrics.timer('detail_fetch', via='browser'):
+                html = self.load_detail_page(listing_url)
+            self.log_event('page_fetch', kind='detail', via='browser', url=listing_url, ok=html is not None,
+                           seconds=round(time.perf_counter() - started, 3))
+            if html is None:
                 return None
+            self.metrics.inc('pages_fetched', kind='detail', via='browser')
 
-            # Login başarılı, detail sayfasını yeniden yükle
-            self.driver.get(listing_url)
-            time.sleep(5)
-
-        if self.handle_cloudflare_challenge():
-            logging.info("Cloudflare challenge handled on detail page, continuing...")
-            time.sleep(4)
+        return self.parse_damage_info(html)
 
-        try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "custom-area"))
-            )
-        except Exception as e:
-            logging.warning(f"Could not find damage area: {e}")
-            return None
+    def load_detail_page(self, listing_url):
+        """Load a listing detail page in the browser, returns page HTML or None"""
+        state = self.open_page(listing_url, (By.CLASS_NAME, "custom-area"), timeout=15)
+        if state == READY:
+            return self.driver.page_source
 
-        html = self.driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
+        if state == RATE_LIMITED:
+            logging.warning("Rate limit kalkmadı, ilan atlanıyor")
+        elif state == LOGIN:
+            logging.error("Login failed - cannot get damage info")
+        else:
+            logging.warning(f"Could not find damage area: {state}")
+        return None
 
-        damage_area = soup.find('div', class_='custom-area')
-        if not damage_area:
+    def parse_damage_info(self, html):
+        with self.metrics.timer('html_parse', page='detail'):
+            damage_info = self.parser.parse_damage_info(html)
+        if damage_info is None:
             logging.warning("No damage area found")
             return None
 
-        painted_parts = []
-        replaced_parts = []
-        local_painted_parts = []
-
-        info_list = damage_area.find('div', class_='car-damage-info-list')
-        if info_list:
-            uls = info_list.find_all('ul')
-
-            for ul in uls:
-                title = ul.find('li', class_='pair-title')
-                if not title:
-                    continue
-
-                title_text = title.text.strip()
-                parts = ul.find_all('li', class_='selected-damage')
-                part_names = [part.text.strip() for part in parts]
-
-                if 'Boyalı' in title_text and 'painted-new' in title.get('class', []):
-                    painted_parts = part_names
-                elif 'Değişen' in title_text and 'changed-new' in title.get('class', []):
-                    replaced_parts = part_names
-                elif 'Lokal' in title_text:
-                    local_painted_parts = part_names
-
-        # Kaput kontrolü - Kaputun temiz olması gerekiyor
-        hood_keywords = ['kaput', 'ön kaput', 'motor kaputu']
-        hood_damaged = False
-        hood_damage_type = None
-
-        for keyword in hood_keywords:
-            # Boyalı kontrolü
-            if any(keyword.lower() in part.lower() for part in painted_parts):
-                hood_damaged = True
-                hood_damage_type = 'boyalı'
-                break
-            # Değişen kontrolü
-            if any(keyword.lower() in part.lower() for part in replaced_parts):
-                hood_damaged = True
-                hood_damage_type = 'değişen'
-                break
-            # Lokal boyalı kontrolü
-            if any(keyword.lower() in part.lower() for part in local_painted_parts):
-                hood_damaged = True
-                hood_damage_type = 'lokal boyalı'
-                break
-
-        damage_info = {
-            'painted_parts': painted_parts,
-            'replaced_parts': replaced_parts,
-            'local_painted_parts': local_painted_parts,
-            'painted_count': len(painted_parts),
-            'replaced_count': len(replaced_parts),
-            'local_painted_count': len(local_painted_parts),
-            'hood_damaged': hood_damaged,
-            'hood_damage_type': hood_damage_type
-        }
-
+        hood_damaged = damage_info['hood_damaged']
+        hood_damage_type = damage_info['hood_damage_type']
         logging.info(f"Damage info - Replaced: {damage_info['replaced_count']}, Painted: {damage_info['painted_count']}, Local Painted: {damage_info['local_painted_count']}, Hood: {'✗ ' + hood_damage_type if hood_damaged else '✓ Temiz'}")
 
         return damage_info
 
     def check_listing(self, listing):
+        # Bu ilan için ölçülen tüm aşamalar marka ve ilan ID'si ile etiketlenir
+        with self.metrics.context(brand=listing.get('brand', 'Unknown'), listing=listing['id']):
+            return self._check_listing(listing)
+
+    def _check_listing(self, listing):
         if listing['id'] in self.seen_ads:
             logging.info(f"Skipping already seen listing: {listing['id']}")
             return False
 
-        damage_info = self.get_damage_info(listing['url'])
+        cached = None
+        if self.seen_ads_expire_days:
+            cached = self.listing_store.stored_damage_info(listing['id'], self.detail_cache_seconds)
+        if cached is not None:
+            damage_info, checked_at = cached
+            logging.info(f"Using stored damage info for {listing['id']} (checked {datetime.fromtimestamp(checked_at).isoformat()})")
+            self.metrics.inc('detail_cache_hits')
+        else:
+            damage_info = self.get_damage_info(listing['url'])
 
         if damage_info is None:
-            logging.info(f"Skipping listing {listing['id']} - No damage info available")
-            self.seen_ads.add(listing['id'])
+            self.metrics.inc('listings_checked', result='failed')
+            with self._lock:
+                attempts = self.seen_ads.record_failure(listing['id'])
+                gave_up = attempts >= self.max_detail_attempts
+                if gave_up:
+                    logging.info(f"Skipping listing {listing['id']} - No damage info after {attempts} attempts, giving up")
+                    self.seen_ads.add(listing['id'])
+                    self.seen_ads.clear_failure(listing['id'])
+                else:
+                    logging.info(f"Skipping listing {listing['id']} - No damage info available, will retry next cycle ({attempts}/{self.max_detail_attempts})")
+            self.log_event('detail_unavailable', url=listing['url'], attempts=attempts, gave_up=gave_up)
             return False
 
         listing['damage_info'] = damage_info
@@ -600,7 +787,15 @@ class SahibindenScraper:
         hood_damaged = damage_info['hood_damaged']
         hood_damage_type = damage_info['hood_damage_type']
 
-        self.seen_ads.add(listing['id'])
+        with self._lock:
+            self.seen_ads.add(listing['id'])
+            self.seen_ads.clear_failure(listing['id'])
+
+        accepted, reason = evaluate_listing(listing, self.max_replaced_parts, self.max_painted_parts)
+        with self.metrics.timer('file_write', target='listing_store'):
+            self.listing_store.record(listing, accepted, reason, detail_fetched=cached is None)
+        self.metrics.inc('listings_checked', result='accepted' if accepted else 'rejected')
+        self.log_decision(listing, accepted, reason, 'detail', cached=cached is not None)
 
         # Kaput hasarlı ise direkt reddet
         if hood_damaged:
@@ -610,14 +805,17 @@ class SahibindenScraper:
             logging.info(f"  Painted parts: {painted_count}/{self.max_painted_parts}")
             return False
 
-        if replaced_count <= self.max_replaced_parts and painted_count <= self.max_painted_parts:
+        if accepted:
             logging.info(f"✓ ACCEPTED: {listing['title']}")
             logging.info(f"  Hood: ✓ Temiz")
             logging.info(f"  Replaced parts: {replaced_count}/{self.max_replaced_parts}")
             logging.info(f"  Painted parts: {painted_count}/{self.max_painted_parts}")
             logging.info(f"  Price: {listing['price']}")
             logging.info(f"  URL: {listing['url']}")
-            self.filtered_listings.append(listing)
+            with self._lock:
+                self.filtered_listings.append(listing)
+            # Kabul anında kalıcı kuyruğa yazılır; tur sonradan hata verse de ilan kaybolmaz
+            self.queue_notifications([listing])
             return True
         else:
             logging.info(f"✗ REJECTED: {listing['title']}")
@@ -626,15 +824,164 @@ class SahibindenScraper:
             logging.info(f"  Painted parts: {painted_count}/{self.max_painted_parts} (exceeded)" if painted_count > self.max_painted_parts else f"  Painted parts: {painted_count}/{self.max_painted_parts}")
             return False
 
-    def run_single_check(self):
+    def log_decision(self, listing, accepted, reason, stage, **extra):
+        """One listing_decision event with the row's typed fields and damage counts"""
+        fields = {
+            'listing': listing['id'],
+            'brand': listing.get('brand'),
+            'stage': stage,
+            'accepted': accepted,
+            'reason': reason,
+            'title': listing.get('title'),
+            'url': listing.get('url'),
+            'price': listing.get('price'),
+            'price_tl': listing.get('price_tl'),
+            'km_value': listing.get('km_value'),
+            'year_value': listing.get('year_value'),
+            'city': listing.get('city'),
+            'district': listing.get('district')
+        }
+        damage_info = listing.get('damage_info')
+        if damage_info:
+            fields.update({
+                key: damage_info.get(key)
+                for key in ('hood_damaged', 'hood_damage_type', 'painted_count', 'replaced_count', 'local_painted_count')
+            })
+        fields.update(extra)
+        self.log_event('listing_decision', **fields)
+
+    def uses_high_water_mark(self, brand):
+        """High-water mark only makes sense on newest-first (date sorted) searches"""
+        if 'high_water_mark' in brand:
+            return bool(brand['high_water_mark'])
+        query = parse_qs(urlparse(brand.get('url', '')).query)
+        return query.get('sorting', [''])[0] == 'date_desc'
+
+    def high_water_mark(self, brand):
+        """
+        The brand's mark, or None when the brand does not use one or its
+        pre-filter rules changed since the mark was set. In the latter case
+        older rows are read again so pre-filtered rows meet the new rules.
+        """
+        if not self.uses_high_water_mark(brand):
+            return None
+        brand_name = brand.get('name', 'Unknown')
+        mark, rules_key = self.seen_ads.get_high_water_mark(brand_name)
+        if mark and rules_key != self.prefilter_key(brand):
+            logging.info(f"Pre-filter rules changed for {brand_name}, ignoring its high-water mark this cycle")
+            return None
+        return mark
+
+    def prefilter_key(self, brand):
+        """Fingerprint of the brand's effective pre-filter rules, stored with its high-water mark"""
+        rules = get_prefilter(self.config, brand)
+        if not rules:
+            return None
+        return hashlib.sha1(json.dumps(rules, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+    def select_new_listings(self, brand, listings):
+        """
+        Returns (window, new_listings). window = rows above the brand's high-water
+        mark (or all rows), new_listings = unseen rows in that window.
+        """
+        brand_name = brand.get('name', 'Unknown')
+        window = listings
+        mark = self.high_water_mark(brand)
+        if mark:
+            ids = [listing['id'] for listing in listings]
+            if mark in ids:
+                window = listings[:ids.index(mark)]
+                logging.info(f"High-water mark {mark} reached at row {len(window) + 1}/{len(listings)}, ignoring older rows")
+
+        new_listings = [listing for listing in window if listing['id'] not in self.seen_ads]
+        skipped = len(window) - len(new_listings)
+        if skipped:
+            logging.info(f"Skipping {skipped} already seen listings for {brand_name}")
+        return window, new_listings
+
+    def apply_prefilter(self, brand, listings):
+        """
+        Drop rows that fail the search-row pre-filter before any detail fetch.
+        Returns (candidates, dropped ids). Dropped rows are recorded as rejected
+        but not marked seen, so they are evaluated again if the rules change;
+        an unchanged decision is not written again.
+        """
+        rules = get_prefilter(self.config, brand)
+        if not rules:
+            return listings, set()
+
+        candidates = []
+        dropped = set()
+        stored = None
+        saved = 0
+        for listing in listings:
+            passed, reason = prefilter_listing(listing, rules)
+            if passed:
+                candidates.append(listing)
+                continue
+            dropped.add(listing['id'])
+            if stored is None:
+                stored = self.listing_store.decisions(listing['id'] for listing in listings)
+            if stored.get(listing['id']) == (False, reason):
+                continue
+            saved += 1
+            logging.info(f"Pre-filtered {listing['id']} - {reason}")
+            self.listing_store.record(listing, False, reason)
+            self.log_decision(listing, False, reason, 'prefilter')
+
+        if dropped:
+            # Önceki turlarda zaten elenmiş satırlar tasarruf sayılmaz
+            logging.info(f"Pre-filter skipped {len(dropped)}/{len(listings)} rows for {brand.get('name', 'Unknown')} ({saved} new, detail fetches saved)")
+            self.metrics.inc('detail_fetches_saved', saved, brand=brand.get('name', 'Unknown'))
+            self.prefiltered_count += saved
+        return candidates, dropped
+
+    def update_high_water_mark(self, brand, window, settled=()):
+        """
+        Move the mark to the newest row such that it and every older row in the
+        window is seen (or settled, e.g. pre-filtered); rows that failed (will
+        be retried) stay above the mark. The mark remembers the pre-filter
+        rules it was set under.
+        """
+        new_mark = None
+        for listing in reversed(window):
+            if listing['id'] not in self.seen_ads and listing['id'] not in settled:
+                break
+            new_mark = listing['id']
+        if new_mark:
+            self.seen_ads.set_high_water_mark(brand.get('name', 'Unknown'), new_mark, self.prefilter_key(brand))
+
+    def process_listings(self, listings):
+        if self.detail_workers > 1:
+            self.get_worker_pool().process(listings)
+            return
+
+        for idx, listing in enumerate(listings, 1):
+            logging.info(f"\n--- Processing listing {idx}/{len(listings)} ---")
+            self.check_listing(listing)
+            self.listing_pacing.pause()
+
+    def enabled_brands(self):
+        return by_priority([b for b in self.config.get('brands', []) if b.get('enabled', True)])
+
+    def run_single_check(self, brands=None):
+        """One scrape cycle over the given brands (default: every enabled brand)"""
         self.filtered_listings = []
+        self.prefiltered_count = 0
+        self.cycle_running = True
+        self.metrics.start_cycle()
+        if self.notification_mode != 'stream':
+            # 'cycle' modunda ilanlar tur boyunca kuyrukta bekler, tur sonunda tek özet gider
+            for notifier in self.notifiers:
+                notifier.hold()
 
         try:
             self.update_status(running=True, login_waiting=False, message="Scrape cycle started")
-            if not self.driver:
-                self.init_driver()
+            self.check_driver_health()
+            if not self.http_fetcher:
+                self.ensure_driver()
 
-            enabled_brands = [b for b in self.config.get('brands', []) if b.get('enabled', True)]
+            enabled_brands = self.enabled_brands() if brands is None else brands
 
             if not enabled_brands:
                 logging.warning("No enabled brands in config")
@@ -644,6 +991,8 @@ class SahibindenScraper:
             for brand in enabled_brands:
                 brand_name = brand.get('name', 'Unknown')
                 url = brand.get('url', '')
+                # Aralık markanın kontrolü başladığı andan itibaren sayılır
+                self.scheduler.mark_checked(brand_name)
 
                 if not url:
                     continue
@@ -652,27 +1001,40 @@ class SahibindenScraper:
                 logging.info(f"Checking brand: {brand_name}")
                 logging.info(f"{'='*60}")
 
-                listings = self.get_listings(url, brand_name)
+                stop_at = self.high_water_mark(brand)
+                max_pages = brand.get('max_pages', self.config.get('max_pages', 1))
+                with self.metrics.context(brand=brand_name):
+                    listings = self.get_listings(url, brand_name, max_pages=max_pages, stop_at=stop_at)
 
                 if not listings:
                     logging.warning(f"No listings found for {brand_name}")
                     continue
 
-                logging.info(f"Processing {len(listings)} listings for {brand_name}...")
+                window, new_listings = self.select_new_listings(brand, listings)
+                new_listings, prefiltered = self.apply_prefilter(brand, new_listings)
+
+                if new_listings:
+                    logging.info(f"Processing {len(new_listings)} new listings for {brand_name}...")
+                    # En yeni / en ucuz ilanların detayı önce çekilir
+                    new_listings = order_listings(new_listings, brand.get('detail_order', self.config.get('detail_order')))
+                    self.process_listings(new_listings)
+                else:
+                    logging.info(f"No new listings for {brand_name}")
 
-                for idx, listing in enumerate(listings, 1):
-                    logging.info(f"\n--- Processing listing {idx}/{len(listings)} ---")
-                    self.check_listing(listing)
-                    # Random delay between listings (3-7 seconds)
-                    delay = random.uniform(3, 7)
-                    logging.info(f"Waiting {delay:.1f}s before next listing...")
-                    time.sleep(delay)
+                if self.uses_high_water_mark(brand):
+                    self.update_high_water_mark(brand, window, prefiltered)
 
-            self.save_seen_ads()
+            with self.metrics.timer('file_write', target='seen_ads'):
+                self.save_seen_ads()
+            with self.metrics.timer('file_write', target='detail_cache'):
+                self.listing_store.trim_detail_cache(self.detail_cache_seconds, self.detail_cache_max_entries)
             self.save_results()
+            with self.metrics.timer('file_write', target='rate_state'):
+                self.rate_controller.save()
+            self.update_status(message="Scrape cycle finished")
 
             if self.filtered_listings:
-                logging.info(f"\n{len(self.filtered_listings)} new listings found! Sending email...")
+                logging.info(f"\n{len(self.filtered_listings)} new listings found and queued for notification")
                 logging.info(f"{'='*60}")
                 logging.info("EMAIL CONTENT:")
                 logging.info(f"{'='*60}")
@@ -685,19 +1047,68 @@ class SahibindenScraper:
                     logging.info(f"  Link: {listing['url']}")
                     logging.info("")
                 logging.info(f"{'='*60}")
-
-                if self.email_sender.send_listings_email(self.filtered_listings):
-                    logging.info("Email sent successfully!")
-                else:
-                    logging.warning("Failed to send email")
             else:
                 logging.info("No new listings matching criteria")
 
         except Exception as e:
             logging.error(f"Error during scraping: {e}", exc_info=True)
             self.update_status(message=f"Error during scraping: {e}")
+        finally:
+            self.cycle_running = False
+            for notifier in self.notifiers:
+                notifier.release()
+            summary = self.metrics.finish_cycle()
+            self.metrics.save()
+            if summary:
+                self.log_event('cycle_summary', accepted=len(self.filtered_listings),
+                               prefiltered=self.prefiltered_count, **summary)
+                logging.info(f"Cycle took {summary['duration_seconds']}s - " + ", ".join(
+                    f"{stage}: {total['seconds']}s" for stage, total in list(summary['stages'].items())[:5]
+                ))
+                self.update_status(last_cycle=summary)
+
+    def queue_notifications(self, listings):
+        """Put listings in every channel's outbox queue and wake the senders"""
+        for notifier in self.notifiers:
+            queued = self.outbox.enqueue(listings, channel=notifier.channel)
+            notifier.wake()
+            if queued:
+                logging.info(f"{queued} listings queued for {notifier.channel} notification")
+
+    def get_worker_pool(self):
+        """Lazily start the detail worker pool (kept alive across cycles)"""
+        if self.worker_pool is None:
+            logging.info(f"Starting {self.detail_workers} detail workers...")
+            self.worker_pool = DetailWorkerPool(self, self.detail_workers, self.config)
+            self.worker_pool.start()
+        return self.worker_pool
+
+    def handle_run_now(self):
+        """IPC: trigger a cycle on the resident scraper"""
+        if self.cycle_running:
+            return {'success': False, 'message': 'Scrape cycle already running'}
+        self.run_now_event.set()
+        return {'success': True, 'message': 'Manual scrape triggered'}
+
+    def handle_stop(self):
+        """IPC: stop the resident scraper after the current cycle"""
+        self.stop_event.set()
+        self.run_now_event.set()
+        return {'success': True, 'message': 'Scraper stopping'}
+
+    def handle_ping(self):
+        return {
+            'success': True,
+            'cycle_running': self.cycle_running,
+            'pid': os.getpid()
+        }
 
     def run(self):
+        command_server = CommandServer({
+            'run-now': self.handle_run_now,
+            'stop': self.handle_stop,
+            'ping': self.handle_ping
+        }, load_authkey(self.data_dir))
         try:
             logging.info("Starting Sahibinden Scraper...")
             logging.info(f"Check interval: {self.config.get('check_interval_minutes', 30)} minutes")
@@ -705,17 +1116,41 @@ class SahibindenScraper:
             logging.info(f"Max painted parts: {self.max_painted_parts}")
             self.update_status(running=True, login_waiting=False, message="Scraper started")
 
-            self.run_single_check()
-
-            interval = self.config.get('check_interval_minutes', 30)
-            schedule.every(interval).minutes.do(self.run_single_check)
+            try:
+                command_server.start()
+            except OSError as e:
+                logging.warning(f"Could not start IPC command server: {e}")
+
+            # Önceki çalışmadan kalan bildirimler de bu thread'lerle gönderilir
+            for notifier in self.notifiers:
+                notifier.start()
+
+            # Tarayıcıyı önceden ısıt, "şimdi çalıştır" beklemeden başlasın
+            if self.config.get('warm_browser', False):
+                self.ensure_driver()
+
+            for brand in self.enabled_brands():
+                logging.info(f"Brand {brand.get('name', 'Unknown')}: every {self.scheduler.interval_seconds(brand) / 60:g} minutes, priority {brand.get('priority', 0)}")
+            logging.info("\nScheduler started. Press Ctrl+C to stop")
+
+            while not self.stop_event.is_set():
+                if self.run_now_event.is_set():
+                    self.run_now_event.clear()
+                    logging.info("Manual scrape triggered from dashboard")
+                    self.run_single_check()
+                    continue
 
-            logging.info(f"\nScheduler started. Checking every {interval} minutes...")
-            logging.info("Press Ctrl+C to stop")
+                brands = self.enabled_brands()
+                due = self.scheduler.due_brands(brands)
+                if due:
+                    # En acil marka tek başına taranır, sonra vadeler yeniden değerlendirilir
+                    self.run_single_check([due[0]])
+                    self.update_status(schedule=self.scheduler.snapshot(brands))
+                    continue
 
-            while True:
-                schedule.run_pending()
-                time.sleep(60)
+                wait = self.scheduler.seconds_until_next(brands)
+                # Dashboard'dan "şimdi çalıştır" gelirse beklemeden uyanır
+                self.run_now_event.wait(timeout=60 if wait is None else min(60, max(1, wait)))
 
         except KeyboardInterrupt:
             logging.info("\nStopping scraper...")
@@ -723,6 +1158,13 @@ class SahibindenScraper:
             logging.error(f"Error in main loop: {e}", exc_info=True)
             self.update_status(message=f"Error in main loop: {e}")
         finally:
+            command_server.close()
+            for notifier in self.notifiers:
+                notifier.stop()
+            if self.worker_pool:
+                logging.info("Stopping detail workers...")
+                self.worker_pool.shutdown()
+                self.worker_pool = None
             if self.driver:
                 logging.info("Closing browser...")
                 try:
@@ -732,17 +1174,67 @@ class SahibindenScraper:
             self.update_status(running=False, login_waiting=False, message="Scraper stopped")
 
     def save_results(self):
-        filename = os.path.join(self.data_dir, 'filtered_listings.json')
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.filtered_listings, f, ensure_ascii=False, indent=2)
-
+        # Kararlar check_listing içinde listing_store'a yazılıyor, burada sadece özet
         logging.info(f"\n{'='*60}")
         logging.info(f"SUMMARY")
         logging.info(f"{'='*60}")
         logging.info(f"Total new accepted listings: {len(self.filtered_listings)}")
-        logging.info(f"Results saved to: {filename}")
+        logging.info(f"Detail fetches saved by pre-filter: {self.prefiltered_count}")
+        logging.info(f"Results saved to: {self.db_file}")
         logging.info(f"{'='*60}")
 
+    def refilter_stored(self, max_replaced_parts=None, max_painted_parts=None, save=False):
+        """Re-apply thresholds to every stored listing without scraping"""
+        if max_replaced_parts is None:
+            max_replaced_parts = self.max_replaced_parts
+        if max_painted_parts is None:
+            max_painted_parts = self.max_painted_parts
+        stored = self.listing_store.all_parsed()
+        accepted = refilter(stored, max_replaced_parts, max_painted_parts)
+        logging.info(f"Refilter: {len(accepted)}/{len(stored)} stored listings accepted (replaced <= {max_replaced_parts}, painted <= {max_painted_parts})")
+
+        if save:
+            self.listing_store.set_decisions(
+                (listing['id'], *evaluate_listing(listing, max_replaced_parts, max_painted_parts))
+                for listing in stored
+            )
+            logging.info("Refilter decisions saved to listing history")
+        return accepted
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sahibinden ilan takip')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('run', help='Scraper\'ı zamanlayıcı ile sürekli çalıştır (varsayılan)')
+    subparsers.add_parser('once', help='Tek bir tarama turu yap ve çık')
+    refilter_parser = subparsers.add_parser('refilter', help='Kayıtlı ilanları yeni eşiklerle tekrar filtrele')
+    refilter_parser.add_argument('--max-replaced', type=int, default=None)
+    refilter_parser.add_argument('--max-painted', type=int, default=None)
+    refilter_parser.add_argument('--save', action='store_true', help='Yeni kararları ilan geçmişine yaz')
+    args = parser.parse_args()
+
+    # Dashboard'un SIGTERM'ü normal çıkış gibi işlenir: finally blokları
+    # bildirimleri gönderir, tarayıcıları kapatır ve durumu yazar
+    def exit_on_sigterm(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+
     scraper = SahibindenScraper()
-    scraper.run()
+    if args.command == 'refilter':
+        for listing in scraper.refilter_stored(args.max_replaced, args.max_painted, save=args.save):
+            print(f"{listing['id']} | {listing.get('brand', 'N/A')} | {listing['price']} | {listing['title']}")
+    elif args.command == 'once':
+        for notifier in scraper.notifiers:
+            notifier.start()
+        try:
+            scraper.run_single_check()
+        finally:
+            # Çıkmadan önce bekleyen bildirimleri gönder
+            for notifier in scraper.notifiers:
+                notifier.stop(flush_timeout=60)
+            if scraper.worker_pool:
+                scraper.worker_pool.shutdown()
+            if scraper.driver:
+                scraper.driver.quit()
+            scraper.update_status(running=False, message="Manual scrape finished")
+    else:
+        scraper.run()
@@ -0,0 +1,112 @@
+"""
+Dashboard ile sürekli çalışan scraper arasında yerel IPC kanalı
+"""
+import json
+import logging
+import os
+import secrets
+import threading
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+IPC_ADDRESS = ('127.0.0.1', int(os.getenv('SCRAPER_IPC_PORT', '6001')))
+AUTHKEY_FILE = 'ipc_authkey'
+
+
+def load_authkey(data_dir):
+    """
+    SCRAPER_IPC_AUTHKEY if set, otherwise the random key in data_dir/ipc_authkey.
+    The file is created (0600) on first use by whichever process starts first.
+    """
+    if os.getenv('SCRAPER_IPC_AUTHKEY'):
+        return os.getenv('SCRAPER_IPC_AUTHKEY').encode()
+
+    path = os.path.join(data_dir, AUTHKEY_FILE)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Diğer süreç oluşturmuş olabilir
+        with open(path, 'rb') as f:
+            key = f.read().strip()
+        if key:
+            return key
+        # Yazılırken yarıda kalmış boş dosya: yeni anahtar yazılır
+        fd = os.open(path, os.O_WRONLY | os.O_TRUNC)
+        os.fchmod(fd, 0o600)
+    key = secrets.token_hex(32).encode()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    logging.info(f"Generated IPC auth key in {path}")
+    return key
+
+
+def _send(conn, message):
+    # pickle yerine JSON: bağlantının öbür ucundan gelen veri çalıştırılamaz
+    conn.send_bytes(json.dumps(message).encode('utf-8'))
+
+
+def _recv(conn):
+    return json.loads(conn.recv_bytes(65536).decode('utf-8'))
+
+
+class CommandServer:
+    """
+    Scraper sürecinde çalışır; 'run-now', 'stop', 'ping' gibi komutları kabul
+    edip handlers sözlüğündeki fonksiyonun dönüşünü cevap olarak yollar.
+    """
+
+    def __init__(self, handlers, authkey, address=IPC_ADDRESS):
+        self.handlers = handlers
+        self.address = address
+        self.authkey = authkey
+        self.listener = None
+
+    def start(self):
+        self.listener = Listener(self.address, authkey=self.authkey)
+        thread = threading.Thread(target=self._accept_loop, name='ipc-server', daemon=True)
+        thread.start()
+        logging.info(f"IPC command server listening on {self.address[0]}:{self.address[1]}")
+
+    def close(self):
+        if self.listener:
+            try:
+                self.listener.close()
+            except Exception:
+                pass
+            self.listener = None
+
+    def _accept_loop(self):
+        while self.listener:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError) as e:
+                if self.listener:
+                    logging.debug(f"IPC accept failed: {e}")
+                continue
+            try:
+                command = _recv(conn)
+                handler = self.handlers.get(command) if isinstance(command, str) else None
+                if handler is None:
+                    _send(conn, {'success': False, 'message': f'Unknown command: {command}'})
+                else:
+                    _send(conn, handler())
+            except Exception as e:
+                logging.debug(f"IPC command failed: {e}")
+            finally:
+                conn.close()
+
+
+def send_command(command, authkey, timeout=2, address=IPC_ADDRESS):
+    """Send a command to the resident scraper, None if it is not running"""
+    try:
+        conn = Client(address, authkey=authkey)
+    except (OSError, EOFError, AuthenticationError):
+        return None
+    try:
+        _send(conn, command)
+        if conn.poll(timeout):
+            return _recv(conn)
+        return None
+    except (OSError, EOFError, ValueError):
+        return None
+    finally:
+        conn.close()
@@ -0,0 +1,151 @@
+"""
+Görülen ilan ID'leri için SQLite tabanlı kalıcı küme
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class SeenAdStore:
+    """
+    Set gibi davranır (in, add, len) ama her ekleme tek satır olarak diske
+    yazılır. Eski seen_ads.json varsa ilk açılışta içe aktarılır. Detay sayfası
+    alınamayan ilanların deneme sayıları da burada tutulur, `once` çalıştırmaları
+    arasında korunur.
+    """
+
+    def __init__(self, db_path, legacy_json_file=None):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen_ads (
+                listing_id TEXT PRIMARY KEY,
+                seen_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_seen_ads_seen_at ON seen_ads (seen_at)')
+        # Tarihe göre sıralı aramalarda marka başına en yeni işlenmiş ilan
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS high_water_marks (
+                brand TEXT PRIMARY KEY,
+                listing_id TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        # Mark'ın kaydedildiği andaki ön filtre kuralları; kurallar değişince mark geçersiz olur
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(high_water_marks)')}
+        if 'rules_key' not in columns:
+            self.conn.execute('ALTER TABLE high_water_marks ADD COLUMN rules_key TEXT')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS detail_failures (
+                listing_id TEXT PRIMARY KEY,
+                attempts INTEGER NOT NULL,
+                last_attempt REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+        if legacy_json_file:
+            self._import_legacy_json(legacy_json_file)
+
+        # Üyelik kontrolü bellekte O(1)
+        self._ids = {row[0] for row in self.conn.execute('SELECT listing_id FROM seen_ads')}
+        self._failures = dict(self.conn.execute('SELECT listing_id, attempts FROM detail_failures'))
+
+    def _import_legacy_json(self, legacy_json_file):
+        if not os.path.exists(legacy_json_file):
+            return
+        try:
+            with open(legacy_json_file, 'r', encoding='utf-8') as f:
+                ids = json.load(f)
+        except Exception as e:
+            logging.warning(f"Could not import {legacy_json_file}: {e}")
+            return
+
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO seen_ads (listing_id, seen_at) VALUES (?, ?)',
+                [(str(listing_id), now) for listing_id in ids]
+            )
+        os.replace(legacy_json_file, legacy_json_file + '.migrated')
+        logging.info(f"Imported {len(ids)} seen ads from {legacy_json_file}")
+
+    def __contains__(self, listing_id):
+        return listing_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, listing_id):
+        with self._lock:
+            if listing_id in self._ids:
+                return
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR IGNORE INTO seen_ads (listing_id, seen_at) VALUES (?, ?)',
+                    (listing_id, time.time())
+                )
+            self._ids.add(listing_id)
+
+    def record_failure(self, listing_id):
+        """Count one more failed detail fetch, returns the attempts so far"""
+        with self._lock:
+            attempts = self._failures.get(listing_id, 0) + 1
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO detail_failures (listing_id, attempts, last_attempt) VALUES (?, ?, ?)',
+                    (listing_id, attempts, time.time())
+                )
+            self._failures[listing_id] = attempts
+        return attempts
+
+    def clear_failure(self, listing_id):
+        with self._lock:
+            if self._failures.pop(listing_id, None) is None:
+                return
+            with self.conn:
+                self.conn.execute('DELETE FROM detail_failures WHERE listing_id = ?', (listing_id,))
+
+    def expire(self, days):
+        """Forget ads first seen more than `days` days ago, returns how many"""
+        cutoff = time.time() - days * 86400
+        with self._lock:
+            expired = [row[0] for row in self.conn.execute(
+                'SELECT listing_id FROM seen_ads WHERE seen_at < ?', (cutoff,)
+            )]
+            # Uzun süredir denenmeyen (listeden düşmüş) ilanların sayaçları da silinir
+            stale = [row[0] for row in self.conn.execute(
+                'SELECT listing_id FROM detail_failures WHERE last_attempt < ?', (cutoff,)
+            )]
+            if stale:
+                with self.conn:
+                    self.conn.execute('DELETE FROM detail_failures WHERE last_attempt < ?', (cutoff,))
+                for listing_id in stale:
+                    self._failures.pop(listing_id, None)
+            if not expired:
+                return 0
+            with self.conn:
+                self.conn.execute('DELETE FROM seen_ads WHERE seen_at < ?', (cutoff,))
+            self._ids.difference_update(expired)
+        return len(expired)
+
+    def get_high_water_mark(self, brand):
+        """(listing_id, rules_key) of the brand's mark, (None, None) if there is none"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT listing_id, rules_key FROM high_water_marks WHERE brand = ?', (brand,)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def set_high_water_mark(self, brand, listing_id, rules_key=None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO high_water_marks (brand, listing_id, updated_at, rules_key) VALUES (?, ?, ?, ?)',
+                (brand, listing_id, time.time(), rules_key)
+            )
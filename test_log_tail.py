@@ -0,0 +1,74 @@
+"""
+log_tail'in offset'ten okurken satır atlamadığını kontrol eden basit script
+"""
+import os
+import tempfile
+
+from log_tail import read_since, tail
+
+
+def write_lines(path, lines, mode='w'):
+    with open(path, mode, encoding='utf-8') as f:
+        f.writelines(line + '\n' for line in lines)
+
+
+def test_read_since_pages_through_backlog():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'test.log')
+        expected = [f"satır {i} ğüş" for i in range(10)]
+        write_lines(path, expected)
+
+        lines, offset, reset = read_since(path, 0, 3)
+        assert not reset
+        assert [line.rstrip('\n') for line in lines] == expected[:3], lines
+
+        collected = list(lines)
+        while True:
+            lines, offset, reset = read_since(path, offset, 3)
+            if not lines:
+                break
+            collected += lines
+        assert [line.rstrip('\n') for line in collected] == expected, collected
+        assert offset == os.path.getsize(path)
+
+
+def test_read_since_waits_for_complete_line():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'test.log')
+        write_lines(path, ['a', 'b'])
+        _, offset = tail(path, 10)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('yarım')
+
+        lines, new_offset, _ = read_since(path, offset, 10)
+        assert lines == [] and new_offset == offset
+
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(' satır\n')
+        lines, _, _ = read_since(path, offset, 10)
+        assert lines == ['yarım satır\n'], lines
+
+
+def test_read_since_after_truncate():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'test.log')
+        write_lines(path, [str(i) for i in range(20)])
+        size = os.path.getsize(path)
+        write_lines(path, ['x', 'y'])
+
+        lines, _, reset = read_since(path, size, 5)
+        assert reset
+        assert lines == ['x\n', 'y\n'], lines
+
+
+if __name__ == '__main__':
+    failed = 0
+    for test in (test_read_since_pages_through_backlog, test_read_since_waits_for_complete_line,
+                 test_read_since_after_truncate):
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,94 @@
+"""
+bs4 ve lxml parser'larının fixtures/ altındaki sayfalarda aynı sonucu verdiğini kontrol eden basit script
+"""
+import os
+
+from page_parsers import BeautifulSoupParser, LxmlParser
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def read_fixture(*parts):
+    with open(os.path.join(FIXTURES_DIR, *parts), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def fixture_files(kind):
+    folder = os.path.join(FIXTURES_DIR, kind)
+    return sorted(name for name in os.listdir(folder) if name.endswith('.html'))
+
+
+def test_search_pages_match():
+    bs4_parser, lxml_parser = BeautifulSoupParser(), LxmlParser()
+    for name in fixture_files('search'):
+        html = read_fixture('search', name)
+        expected = bs4_parser.parse_listings(html, 'Kia Rio')
+        actual = lxml_parser.parse_listings(html, 'Kia Rio')
+        assert expected, f"{name}: no listings parsed"
+        assert actual == expected, f"{name}: lxml output differs\n{actual}\n!=\n{expected}"
+
+
+def test_search_page_fields():
+    listings = LxmlParser().parse_listings(read_fixture('search', 'kia_rio_page1.html'), 'Kia Rio')
+    # nativeAd satırı atlanmalı
+    assert [listing['id'] for listing in listings] == ['1286652975', '1287001122', '1286990001']
+    first = listings[0]
+    assert first['url'] == 'https://www.sahibinden.com/ilan/vasita-otomobil-kia-2020-model-rio-1.4-elegance-tekno-sadece-31-bin-km-1286652975/detay'
+    assert (first['year'], first['km'], first['color'], first['price']) == ('2020', '31.000', 'Mavi', '1.039.850 TL')
+    assert listings[1]['title'] == 'GALERİDEN RIO 1.4 CVVT ELEGANCE TEKNO "HATASIZ" 2021'
+    assert listings[2]['url'].startswith('https://www.sahibinden.com/ilan/')
+    # Tipli alanlar
+    assert (first['price_tl'], first['km_value'], first['year_value']) == (1039850, 31000, 2020)
+    assert (first['city'], first['district']) == ('İstanbul', 'Pendik')
+
+
+def test_search_edge_cases():
+    listings = LxmlParser().parse_listings(read_fixture('search', 'honda_civic_edge_cases.html'), 'Honda Civic')
+    # Reklam, başlıksız ve data-id'siz satırlar atlanır
+    assert [listing['id'] for listing in listings] == ['1285500100', '1285500200', '1285500400']
+    # Fiyat span'ı olmayan satır
+    assert listings[0]['price'] == 'N/A'
+    # Eksik sütunlar
+    assert (listings[1]['km'], listings[1]['color'], listings[1]['location']) == ('N/A', 'N/A', 'N/A')
+    assert (listings[0]['price_tl'], listings[1]['km_value'], listings[1]['city']) == (None, None, None)
+    assert listings[2]['title'] == 'CIVIC 1.6 ELEGANCE SUNROOF & HATASIZ'
+
+
+def test_detail_pages_match():
+    bs4_parser, lxml_parser = BeautifulSoupParser(), LxmlParser()
+    for name in fixture_files('detail'):
+        html = read_fixture('detail', name)
+        assert lxml_parser.parse_damage_info(html) == bs4_parser.parse_damage_info(html), f"{name}: lxml output differs"
+
+
+def test_damage_info_fields():
+    parser = LxmlParser()
+
+    info = parser.parse_damage_info(read_fixture('detail', 'rio_painted_replaced.html'))
+    assert info['painted_parts'] == ['Sol Arka Kapı', 'Sol Arka Çamurluk']
+    assert info['replaced_parts'] == ['Sol Ön Çamurluk']
+    assert (info['painted_count'], info['replaced_count'], info['local_painted_count']) == (2, 1, 0)
+    assert info['hood_damaged'] is False
+
+    info = parser.parse_damage_info(read_fixture('detail', 'egea_hood_local.html'))
+    assert info['local_painted_parts'] == ['Motor Kaputu', 'Ön Tampon']
+    assert info['hood_damaged'] is True
+    assert info['hood_damage_type'] == 'lokal boyalı'
+
+    info = parser.parse_damage_info(read_fixture('detail', 'civic_hood_painted.html'))
+    assert info['hood_damage_type'] == 'boyalı'
+
+    assert parser.parse_damage_info(read_fixture('detail', 'no_damage_area.html')) is None
+
+
+if __name__ == '__main__':
+    failed = 0
+    for test in (test_search_pages_match, test_search_page_fields, test_search_edge_cases,
+                 test_detail_pages_match, test_damage_info_fields):
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,117 @@
+"""
+Webhook bildirim kanalını yerel bir alıcıya karşı test eden basit script
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from notification_outbox import NotificationOutbox, NotificationSender, WebhookSink
+
+# Test verisi
+TEST_LISTING = {
+    'id': '1286652975',
+    'title': '2020 MODEL RIO 1.4 ELEGANCE TEKNO SADECE 31 BİN KM',
+    'url': 'https://www.sahibinden.com/ilan/vasita-otomobil-kia-2020-model-rio-1.4-elegance-tekno-sadece-31-bin-km-1286652975/detay',
+    'price': '1.039.850 TL',
+    'brand': 'Kia Rio',
+    'damage_info': {'painted_count': 2, 'replaced_count': 1}
+}
+
+
+class Receiver:
+    """Yerel webhook alıcısı, gelen istekleri received listesinde toplar"""
+
+    def __init__(self):
+        self.received = []
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                receiver.received.append((time.time(), json.loads(body)))
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/hook'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def wait_for(self, count, timeout=5):
+        deadline = time.time() + timeout
+        while len(self.received) < count and time.time() < deadline:
+            time.sleep(0.05)
+        return len(self.received) >= count
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@contextmanager
+def webhook_sender():
+    """(receiver, outbox, sender) with a temporary outbox database"""
+    receiver = Receiver()
+    with tempfile.TemporaryDirectory() as data_dir:
+        outbox = NotificationOutbox(os.path.join(data_dir, 'outbox.db'))
+        sender = NotificationSender(outbox, WebhookSink(receiver.url), batch_window_seconds=0, poll_seconds=0.1)
+        sender.start()
+        try:
+            yield receiver, outbox, sender
+        finally:
+            sender.stop(flush_timeout=0)
+            receiver.close()
+            outbox.conn.close()
+
+
+def test_listing_is_delivered():
+    with webhook_sender() as (receiver, outbox, sender):
+        outbox.enqueue([TEST_LISTING], channel='webhook')
+        sender.wake()
+        assert receiver.wait_for(1), "webhook request did not arrive"
+        payload = receiver.received[0][1]
+        assert payload['count'] == 1
+        assert payload['listings'][0]['id'] == TEST_LISTING['id']
+
+
+def test_same_listing_is_not_sent_twice():
+    with webhook_sender() as (receiver, outbox, sender):
+        outbox.enqueue([TEST_LISTING], channel='webhook')
+        sender.wake()
+        assert receiver.wait_for(1)
+
+        assert outbox.enqueue([TEST_LISTING], channel='webhook') == 0
+        sender.wake()
+        time.sleep(0.5)
+        assert len(receiver.received) == 1, f"sent {len(receiver.received)} times"
+
+
+def test_failed_listing_stays_queued():
+    with webhook_sender() as (receiver, outbox, sender):
+        # Alıcı kapalıyken kayıt kaybolmamalı
+        receiver.close()
+        outbox.enqueue([dict(TEST_LISTING, id='1286652976')], channel='webhook')
+        sender.wake()
+        deadline = time.time() + 5
+        while outbox.stats('webhook')['retrying'] == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        stats = outbox.stats('webhook')
+        assert stats['pending'] == 1 and stats['retrying'] == 1, f"unexpected queue state: {stats}"
+
+
+if __name__ == '__main__':
+    failed = 0
+    for test in (test_listing_is_delivered, test_same_listing_is_not_sent_twice, test_failed_listing_stays_queued):
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    raise SystemExit(1 if failed else 0)
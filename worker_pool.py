@@ -0,0 +1,89 @@
+"""
+Detay sayfalarını paralel çekmek için Chrome worker havuzu
+"""
+import logging
+import queue
+import threading
+
+from page_readiness import PacingPolicy
+
+
+class DetailWorkerPool:
+    """
+    N adet bağımsız Chrome oturumu ortak kuyruktan check_listing işleri çeker.
+    Her worker kendi driver'ını (ve sahibinden_cookies.json'dan yüklenen
+    cookie'lerini) ve kendi bekleme temposunu kullanır. Driver sadece HTTP
+    yolu tarayıcıya düştüğünde açılır.
+    """
+
+    _STOP = object()
+
+    def __init__(self, scraper, size, config):
+        self.scraper = scraper
+        self.size = size
+        self.config = config
+        self.jobs = queue.Queue()
+        self.threads = []
+
+    def start(self):
+        for worker_id in range(1, self.size + 1):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(worker_id,),
+                name=f"detail-worker-{worker_id}",
+                daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def process(self, listings):
+        """Enqueue listings and block until every worker finished them"""
+        for listing in listings:
+            self.jobs.put(listing)
+        self.jobs.join()
+
+    def shutdown(self, timeout=30):
+        # Bekleyen işler atılır (ilanlar görülmedi sayılır, sonraki turda tekrar gelir);
+        # worker'lar ellerindeki işi bitirip tarayıcılarını kapatır
+        while True:
+            try:
+                self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            self.jobs.task_done()
+        for _ in self.threads:
+            self.jobs.put(self._STOP)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def _worker_loop(self, worker_id):
+        pacing = PacingPolicy.from_config(
+            self.config, 'between_listings', f"[worker {worker_id}] Waiting before next listing:"
+        )
+        # Driver, ilk tarayıcı gereken sayfada scraper.ensure_driver() ile açılır
+        while True:
+            listing = self.jobs.get()
+            if listing is self._STOP:
+                self.jobs.task_done()
+                break
+
+            try:
+                logging.info(f"\n--- [worker {worker_id}] Processing listing {listing['id']} ---")
+                self.scraper.check_driver_health()
+                self.scraper.check_listing(listing)
+            except Exception as e:
+                logging.error(f"[worker {worker_id}] Error checking listing {listing.get('id')}: {e}")
+            finally:
+                self.jobs.task_done()
+
+            # Her worker kendi temposunda bekler
+            pacing.pause()
+
+        driver = self.scraper.driver
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            self.scraper.driver = None